@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+LLM Adjudication of Low-Confidence Verdicts
+
+The home-language rule cascade is tuned for recall, so weak rules (a
+common short word, a letter pair, a word ending, "i" between brand names)
+also fire on brand-heavy English text. LLMAdjudicator gives those
+verdicts a second opinion from a chat model: snippets are packed many to
+a request, requests run concurrently up to a cap, answers are cached by
+text hash, and each page has a token and a time budget. Snippets that do not fit the
+budget, or whose request fails, keep their heuristic verdict.
+
+The model is reached through the OpenAI client, so any compatible server
+(a proxy, a self-hosted model, a local stub) can be used via ``base_url``.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from metrics import PIPELINE_METRICS
+from web_scraper import LanguageCache
+
+# Rules that decide a home language on weak evidence
+LOW_CONFIDENCE_STRATEGIES = frozenset(('common_words', 'digraphs', 'endings', 'single_word',
+                                       'brand_conjunction'))
+
+SYSTEM_PROMPT = (
+    "You identify the language of short text snippets taken from web pages. "
+    "Brand and product names do not count towards a language. Answer with a "
+    "JSON object mapping each snippet number to its ISO 639-1 language code, "
+    "or null if the snippet has no identifiable language."
+)
+
+LANGUAGE_CODE_RE = re.compile(r'^[a-z]{2,3}$')
+
+
+class PageBudget:
+    """Tokens and time a page may still spend on adjudication, shared by
+    every review of that page."""
+
+    def __init__(self, tokens: int, seconds: float):
+        self.tokens = tokens
+        self.deadline = time.monotonic() + seconds
+        self.lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> bool:
+        """Take tokens from the budget; False if not enough are left."""
+        with self.lock:
+            if tokens > self.tokens:
+                return False
+            self.tokens -= tokens
+            return True
+
+    def refund(self, tokens: int):
+        """Return reserved tokens (negative when a request used more than reserved)."""
+        with self.lock:
+            self.tokens += tokens
+
+    def remaining_time(self) -> float:
+        return self.deadline - time.monotonic()
+
+
+class LLMAdjudicator:
+    """Re-checks low-confidence home-language verdicts with a chat model."""
+
+    def __init__(self, model: str = 'gpt-4o-mini', base_url: Optional[str] = None,
+                 api_key: Optional[str] = None, batch_size: int = 40,
+                 max_concurrency: int = 4, page_token_budget: int = 8000,
+                 page_time_budget: float = 20.0, cache_size: int = 50000):
+        """
+        ``base_url`` and ``api_key`` default to OPENAI_BASE_URL and
+        OPENAI_API_KEY. At most ``max_concurrency`` requests are in flight
+        across all pages; one page spends at most ``page_token_budget``
+        tokens and ``page_time_budget`` seconds on adjudication.
+        """
+        self.model = model
+        self.base_url = base_url or os.environ.get('OPENAI_BASE_URL')
+        self.api_key = api_key or os.environ.get('OPENAI_API_KEY')
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.page_token_budget = page_token_budget
+        self.page_time_budget = page_time_budget
+        self.cache = LanguageCache(cache_size)
+        self.requests = threading.BoundedSemaphore(self.max_concurrency)
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """OpenAI client for the configured server, created (and imported) on first use."""
+        with self._client_lock:
+            if self._client is None:
+                if not self.api_key and not self.base_url:
+                    raise Exception("LLM adjudication needs OPENAI_API_KEY or a base URL")
+                from openai import OpenAI
+                # Local stub servers usually accept any key
+                self._client = OpenAI(api_key=self.api_key or 'unused',
+                                      base_url=self.base_url, max_retries=0)
+            return self._client
+
+    @staticmethod
+    def cache_key(text: str) -> str:
+        """Cache key of a snippet: the hash of its normalized text."""
+        normalized = ' '.join(text.split()).lower()
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def estimate_tokens(texts: List[str]) -> int:
+        """Rough token count of a request for these snippets (about 4 characters per token)."""
+        return 100 + sum(len(text) // 4 + 8 for text in texts)
+
+    def page_budget(self) -> PageBudget:
+        """A fresh budget for one page, starting its time budget now."""
+        return PageBudget(self.page_token_budget, self.page_time_budget)
+
+    def review(self, texts: List[str], decisions: List[Tuple[Optional[str], str]],
+               budget: Optional[PageBudget] = None) -> List[Optional[str]]:
+        """Return the languages of the (language, strategy) ``decisions``, with
+        low-confidence home-language verdicts re-decided by the model.
+
+        A page reviewed in several parts passes the same ``budget`` to each
+        review; without one the review gets a page budget of its own.
+        """
+        # Cache key per snippet to review, None for confident verdicts
+        keys: List[Optional[str]] = []
+        languages: List[Optional[str]] = []
+        verdicts = {}
+        pending: Dict[str, str] = {}
+        for text, (language, strategy) in zip(texts, decisions):
+            languages.append(language)
+            key = None
+            # Only home-language rules produce these strategies
+            if strategy in LOW_CONFIDENCE_STRATEGIES:
+                key = self.cache_key(text)
+                if key not in verdicts:
+                    verdicts[key] = self.cache.get(key)
+                    if verdicts[key] is LanguageCache.MISSING:
+                        pending[key] = text
+            keys.append(key)
+
+        if pending:
+            verdicts.update(self._adjudicate(pending, budget or self.page_budget()))
+
+        reviewed = []
+        for key, language in zip(keys, languages):
+            if key is not None and verdicts.get(key, LanguageCache.MISSING) is not LanguageCache.MISSING:
+                language = verdicts[key]
+            reviewed.append(language)
+        return reviewed
+
+    def _adjudicate(self, pending: Dict[str, str], budget: PageBudget) -> Dict[str, Optional[str]]:
+        """Send the snippets in batches within the page's budget.
+
+        Tokens are reserved before each request is sent. Returns (and
+        caches) the answered verdicts by cache key.
+        """
+        keys = list(pending)
+        batches = [keys[i:i + self.batch_size] for i in range(0, len(keys), self.batch_size)]
+        answered: Dict[str, Optional[str]] = {}
+
+        def run(batch: List[str]):
+            texts = [pending[key] for key in batch]
+            estimate = self.estimate_tokens(texts)
+            if not budget.reserve(estimate):
+                PIPELINE_METRICS.count_verdict('llm_skipped', len(batch))
+                return
+            with self.requests:
+                remaining = budget.remaining_time()
+                if remaining <= 0:
+                    budget.refund(estimate)
+                    PIPELINE_METRICS.count_verdict('llm_skipped', len(batch))
+                    return
+                try:
+                    verdicts, used = self.ask(texts, remaining)
+                except Exception:
+                    # Nothing was answered, so the reservation goes back
+                    budget.refund(estimate)
+                    PIPELINE_METRICS.count_verdict('llm_failed', len(batch))
+                    return
+            budget.refund(estimate - used)
+            for key, verdict in zip(batch, verdicts):
+                if verdict is not LanguageCache.MISSING:
+                    answered[key] = verdict
+                    self.cache.put(key, verdict)
+                    PIPELINE_METRICS.count_verdict('llm')
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+            list(executor.map(run, batches))
+        return answered
+
+    def ask(self, texts: List[str], timeout: float) -> Tuple[list, int]:
+        """Ask the model for the languages of the snippets in one request.
+
+        Returns one verdict per snippet (a language code, None, or
+        LanguageCache.MISSING when the answer skipped it or is malformed)
+        and the tokens used.
+        """
+        numbered = '\n'.join(f"{i}. {json.dumps(text, ensure_ascii=False)}"
+                             for i, text in enumerate(texts, 1))
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {'role': 'system', 'content': SYSTEM_PROMPT},
+                {'role': 'user', 'content': numbered},
+            ],
+            temperature=0,
+            response_format={'type': 'json_object'},
+            timeout=timeout,
+        )
+        content = response.choices[0].message.content or ''
+        # Tolerate code fences or prose around the JSON object
+        start, end = content.find('{'), content.rfind('}')
+        answers = json.loads(content[start:end + 1]) if start != -1 else {}
+        if not isinstance(answers, dict):
+            answers = {}
+
+        verdicts = []
+        for i in range(1, len(texts) + 1):
+            answer = answers.get(str(i), LanguageCache.MISSING)
+            if isinstance(answer, str) and LANGUAGE_CODE_RE.match(answer.strip().lower()):
+                answer = answer.strip().lower()
+            elif answer is not None:
+                # Missing or malformed answers keep the heuristic verdict
+                answer = LanguageCache.MISSING
+            verdicts.append(answer)
+
+        usage = getattr(response, 'usage', None)
+        used = getattr(usage, 'total_tokens', None) or self.estimate_tokens(texts)
+        return verdicts, used
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Admission Control for the Web Interface
+
+Keeps a burst of /analyze calls from exhausting threads and memory:
+AdmissionController caps how many analyses run at once and how many
+requests may wait for a slot (and for how long), and RateLimiter gives
+each client a token bucket. Both answer "no" immediately with an estimate
+of when to retry, which the app turns into 429 + Retry-After.
+
+Limits are per process; under a prefork server each worker enforces its
+own.
+"""
+
+import math
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted; carries a retry estimate."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """In-flight analysis cap with a bounded, time-limited wait queue."""
+
+    # Bounds (seconds) of the Retry-After estimate
+    MIN_RETRY_AFTER = 1
+    MAX_RETRY_AFTER = 120
+
+    def __init__(self, max_in_flight: int = 4, max_waiting: int = 8,
+                 max_wait: float = 10.0):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        # Moving average of how long an analysis holds its slot
+        self.average_seconds = 5.0
+
+    def retry_after(self, queued: int = 0) -> int:
+        """Seconds until a new request is likely to be admitted, given
+        ``queued`` requests ahead of it besides the ones waiting here."""
+        rounds = (self.waiting + queued) / self.max_in_flight + 1
+        estimate = math.ceil(self.average_seconds * rounds)
+        return max(self.MIN_RETRY_AFTER, min(self.MAX_RETRY_AFTER, estimate))
+
+    def reject(self, message: str, queued: int = 0) -> Overloaded:
+        """Count a rejected request and build its Overloaded error."""
+        with self.condition:
+            self.rejected += 1
+            return Overloaded(message, self.retry_after(queued))
+
+    def acquire(self, admitted: bool = False) -> float:
+        """Take an analysis slot, waiting up to ``max_wait`` seconds.
+
+        Raises Overloaded when the wait queue is full or the wait times
+        out. ``admitted`` callers (jobs already accepted by a bounded job
+        queue) wait as long as it takes instead. Returns the acquisition
+        time, to be passed to ``release``.
+        """
+        with self.condition:
+            if self.in_flight >= self.max_in_flight:
+                if not admitted and self.waiting >= self.max_waiting:
+                    raise self.reject("Too many analyses in progress, please try again shortly")
+                deadline = time.monotonic() + self.max_wait
+                self.waiting += 1
+                try:
+                    while self.in_flight >= self.max_in_flight:
+                        remaining = None if admitted else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            raise self.reject("Timed out waiting for a free analysis slot")
+                        self.condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, acquired: float):
+        """Give back a slot taken by ``acquire``."""
+        with self.condition:
+            self.in_flight -= 1
+            held = time.monotonic() - acquired
+            self.average_seconds = 0.8 * self.average_seconds + 0.2 * held
+            self.condition.notify()
+
+    @contextmanager
+    def slot(self, admitted: bool = False) -> Iterator[None]:
+        """Hold an analysis slot for the enclosed block (see ``acquire``)."""
+        acquired = self.acquire(admitted)
+        try:
+            yield
+        finally:
+            self.release(acquired)
+
+    def stats(self) -> dict:
+        """Return current occupancy and the rejection count."""
+        with self.condition:
+            return {
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'rejected': self.rejected,
+                'max_in_flight': self.max_in_flight,
+                'average_seconds': self.average_seconds,
+            }
+
+
+class RateLimiter:
+    """Per-client token buckets: ``per_minute`` requests, bursts of ``burst``."""
+
+    # Idle buckets are dropped once this many clients are tracked
+    MAX_CLIENTS = 10000
+
+    def __init__(self, per_minute: float = 30, burst: int = 10):
+        self.rate = per_minute / 60.0
+        self.burst = max(1, burst)
+        self.lock = threading.Lock()
+        # client -> [tokens, last refill time]
+        self.buckets: Dict[str, List[float]] = {}
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def check(self, client: str):
+        """Take one token for a client, raising Overloaded if it has none."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(client)
+            if bucket is None:
+                if len(self.buckets) >= self.MAX_CLIENTS:
+                    self._prune(now)
+                bucket = self.buckets[client] = [float(self.burst), now]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                self.rejected += 1
+                raise Overloaded("Rate limit exceeded, please slow down",
+                                 math.ceil((1 - bucket[0]) / self.rate))
+            bucket[0] -= 1
+
+    def _prune(self, now: float):
+        """Drop buckets that have refilled completely. Caller holds the lock."""
+        full = [client for client, (tokens, last) in self.buckets.items()
+                if tokens + (now - last) * self.rate >= self.burst]
+        for client in full:
+            del self.buckets[client]
@@ -8,73 +8,323 @@ for the web scraper functionality.
 
 import os
 import json
-from flask import Flask, render_template, request, jsonify, send_file
-from web_scraper import WebTextExtractor
-import tempfile
+import threading
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
+import web_scraper
+from web_scraper import WebTextExtractor, language_cache_stats, normalize_url
+from serializers import FORMATS, iter_ndjson
+from jobs import Job, JobQueue, QueueFull
+from admission import AdmissionController, Overloaded, RateLimiter
+from http_cache import HttpCache
+from result_store import ResultStore
+from metrics import render_prometheus
+from rule_packs import parse_languages
 
 app = Flask(__name__)
+app.config.update(
+    ANALYSIS_WORKERS=int(os.environ.get('ANALYSIS_WORKERS', 4)),
+    ANALYSIS_QUEUE_SIZE=int(os.environ.get('ANALYSIS_QUEUE_SIZE', 20)),
+    ANALYSIS_JOB_TTL=int(os.environ.get('ANALYSIS_JOB_TTL', 3600)),
+    ANALYSIS_JOBS_DIR=os.environ.get('ANALYSIS_JOBS_DIR'),
+    ANALYSIS_MAX_WAITING=int(os.environ.get('ANALYSIS_MAX_WAITING', 8)),
+    ANALYSIS_MAX_WAIT=float(os.environ.get('ANALYSIS_MAX_WAIT', 10)),
+    RATE_LIMIT_PER_MINUTE=float(os.environ.get('RATE_LIMIT_PER_MINUTE', 30)),
+    RATE_LIMIT_BURST=int(os.environ.get('RATE_LIMIT_BURST', 10)),
+    TRUSTED_PROXIES=int(os.environ.get('TRUSTED_PROXIES', 0)),
+    HTTP_TIMEOUT=int(os.environ.get('HTTP_TIMEOUT', 30)),
+    HTTP_POOL_CONNECTIONS=int(os.environ.get('HTTP_POOL_CONNECTIONS', 10)),
+    HTTP_POOL_MAXSIZE=int(os.environ.get('HTTP_POOL_MAXSIZE', 10)),
+    HTTP_MAX_RETRIES=int(os.environ.get('HTTP_MAX_RETRIES', 2)),
+    HTTP_BACKOFF_FACTOR=float(os.environ.get('HTTP_BACKOFF_FACTOR', 0.5)),
+    CLASSIFY_WORKERS=int(os.environ.get('CLASSIFY_WORKERS', 1)),
+    CLASSIFY_PARALLEL_THRESHOLD=int(os.environ.get('CLASSIFY_PARALLEL_THRESHOLD', 500)),
+    LANGUAGE_BACKEND=os.environ.get('LANGUAGE_BACKEND', 'langdetect'),
+    HOME_LANGUAGES=parse_languages(os.environ.get('HOME_LANGUAGES', 'pl')),
+    HTTP_CACHE_DIR=os.environ.get('HTTP_CACHE_DIR'),
+    HTTP_CACHE_MAX_BYTES=int(os.environ.get('HTTP_CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+    LLM_ADJUDICATION=os.environ.get('LLM_ADJUDICATION', '') not in ('', '0', 'false'),
+    LLM_BASE_URL=os.environ.get('OPENAI_BASE_URL'),
+    LLM_MODEL=os.environ.get('LLM_MODEL', 'gpt-4o-mini'),
+    LLM_BATCH_SIZE=int(os.environ.get('LLM_BATCH_SIZE', 40)),
+    LLM_MAX_CONCURRENCY=int(os.environ.get('LLM_MAX_CONCURRENCY', 4)),
+    LLM_PAGE_TOKEN_BUDGET=int(os.environ.get('LLM_PAGE_TOKEN_BUDGET', 8000)),
+    LLM_PAGE_TIME_BUDGET=float(os.environ.get('LLM_PAGE_TIME_BUDGET', 20)),
+    RESULTS_DIR=os.environ.get('RESULTS_DIR'),
+    RESULTS_TTL=int(os.environ.get('RESULTS_TTL', 24 * 3600)),
+    RESULTS_MAX_BYTES=int(os.environ.get('RESULTS_MAX_BYTES', 512 * 1024 * 1024)),
+    RESULTS_MEMORY_THRESHOLD=int(os.environ.get('RESULTS_MEMORY_THRESHOLD', 64 * 1024)),
+    RESULTS_SWEEP_INTERVAL=int(os.environ.get('RESULTS_SWEEP_INTERVAL', 300)),
+)
+
+if app.config['TRUSTED_PROXIES']:
+    # Take the client address from X-Forwarded-For set by this many proxies
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'])
+
+# ANALYSIS_WORKERS caps queued jobs and synchronous analyses together
+admission = AdmissionController(
+    max_in_flight=app.config['ANALYSIS_WORKERS'],
+    max_waiting=app.config['ANALYSIS_MAX_WAITING'],
+    max_wait=app.config['ANALYSIS_MAX_WAIT'],
+)
+rate_limiter = RateLimiter(
+    per_minute=app.config['RATE_LIMIT_PER_MINUTE'],
+    burst=app.config['RATE_LIMIT_BURST'],
+)
+
+result_store = ResultStore(
+    app.config['RESULTS_DIR'],
+    ttl=app.config['RESULTS_TTL'],
+    max_bytes=app.config['RESULTS_MAX_BYTES'],
+    memory_threshold=app.config['RESULTS_MEMORY_THRESHOLD'],
+    sweep_interval=app.config['RESULTS_SWEEP_INTERVAL'],
+)
+result_store.start_sweeper()
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_extractor() -> WebTextExtractor:
+    """Return the long-lived extractor shared by all requests."""
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            http_cache = None
+            if app.config['HTTP_CACHE_DIR']:
+                http_cache = HttpCache(app.config['HTTP_CACHE_DIR'],
+                                       max_bytes=app.config['HTTP_CACHE_MAX_BYTES'])
+            adjudicator = None
+            if app.config['LLM_ADJUDICATION']:
+                from adjudicator import LLMAdjudicator
+                adjudicator = LLMAdjudicator(
+                    model=app.config['LLM_MODEL'],
+                    base_url=app.config['LLM_BASE_URL'],
+                    batch_size=app.config['LLM_BATCH_SIZE'],
+                    max_concurrency=app.config['LLM_MAX_CONCURRENCY'],
+                    page_token_budget=app.config['LLM_PAGE_TOKEN_BUDGET'],
+                    page_time_budget=app.config['LLM_PAGE_TIME_BUDGET'],
+                )
+            _extractor = WebTextExtractor(
+                timeout=app.config['HTTP_TIMEOUT'],
+                pool_connections=app.config['HTTP_POOL_CONNECTIONS'],
+                pool_maxsize=max(app.config['HTTP_POOL_MAXSIZE'],
+                                 app.config['ANALYSIS_WORKERS']),
+                max_retries=app.config['HTTP_MAX_RETRIES'],
+                backoff_factor=app.config['HTTP_BACKOFF_FACTOR'],
+                http_cache=http_cache,
+                classify_workers=app.config['CLASSIFY_WORKERS'],
+                parallel_threshold=app.config['CLASSIFY_PARALLEL_THRESHOLD'],
+                language_backend=app.config['LANGUAGE_BACKEND'],
+                adjudicator=adjudicator,
+                home_languages=app.config['HOME_LANGUAGES'],
+            )
+        return _extractor
+
+
+def warm_up() -> float:
+    """Build the shared extractor and load everything its first analysis
+    needs; returns the seconds taken. server.py runs this before forking."""
+    return web_scraper.warm_up(get_extractor())
+
+
+def after_fork():
+    """Restart the background threads a forked worker did not inherit."""
+    result_store.start_sweeper()
+
+
+def run_analysis(job: Job) -> dict:
+    """Analyze a job's URL and keep its result in the store for download."""
+    # Process URL with the shared extractor so connections are reused
+    elements = get_extractor().extract_non_polish(job.url, progress=job.update)
+    result_key = result_store.put(elements)
+    
+    return {
+        'snippets': len(elements),
+        'download_url': f'/download/{result_key}',
+    }
+
+
+job_queue = JobQueue(
+    run_analysis,
+    max_workers=app.config['ANALYSIS_WORKERS'],
+    max_queued=app.config['ANALYSIS_QUEUE_SIZE'],
+    job_ttl=app.config['ANALYSIS_JOB_TTL'],
+    admission=admission,
+    state_dir=app.config['ANALYSIS_JOBS_DIR'],
+)
 
 @app.route('/')
 def index():
     """Main page with URL input form."""
     return render_template('index.html')
 
+def requested_format(data: dict):
+    """The result format asked for with a ``format`` parameter or Accept header.
+    
+    None means the default asynchronous job. Accept only selects the
+    unambiguous streaming types, since JSON clients expect the job response.
+    """
+    output_format = request.args.get('format') or data.get('format')
+    if output_format is not None and not isinstance(output_format, str):
+        # Not a format name at all; reported like an unknown one
+        return ''
+    if output_format:
+        return output_format.lower()
+    for mimetype, quality in request.accept_mimetypes:
+        if quality and mimetype in ('application/x-ndjson', 'text/csv'):
+            return 'ndjson' if mimetype == 'application/x-ndjson' else 'csv'
+    return None
+
+def ndjson_results(url: str):
+    """Stream NDJSON results while the page is still being classified.
+    
+    Holds an admission slot until the stream ends or the client goes away.
+    """
+    acquired = admission.acquire()
+    try:
+        stream = iter_ndjson(get_extractor().iter_non_polish(url))
+        # Fetch and parse errors surface here, before the response has started
+        first = next(stream, '')
+    except Exception:
+        admission.release(acquired)
+        raise
+    
+    def generate():
+        try:
+            yield first
+            yield from stream
+        except Exception as e:
+            yield json.dumps({'error': str(e)}) + '\n'
+        finally:
+            admission.release(acquired)
+    return generate()
+
+def overloaded(error: Overloaded):
+    """A fast 429 response telling the client when to retry."""
+    response = jsonify({'error': str(error), 'retry_after': error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
 @app.route('/analyze', methods=['POST'])
 def analyze_url():
-    """Analyze URL and return results."""
+    """Queue a URL for analysis and return the job ID, or with a result
+    format requested, analyze it right away and stream the results."""
     try:
-        data = request.get_json()
-        url = data.get('url', '').strip()
+        rate_limiter.check(request.remote_addr or 'unknown')
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict) or not isinstance(data.get('url', ''), str):
+            return jsonify({'error': 'Expected a JSON object with a "url" string'}), 400
+        url = normalize_url(data.get('url', ''))
         
         if not url:
             return jsonify({'error': 'Please enter a URL'}), 400
         
-        # Add protocol if missing
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-        
-        # Create extractor and process URL
-        extractor = WebTextExtractor()
-        html_output = extractor.process_url(url)
+        output_format = requested_format(data)
+        if output_format is not None:
+            if output_format not in FORMATS:
+                return jsonify({'error': f"Unknown format, use one of: {', '.join(FORMATS)}"}), 400
+            if output_format == 'ndjson':
+                body = ndjson_results(url)
+            else:
+                with admission.slot():
+                    elements = get_extractor().extract_non_polish(url)
+                body = timed_report(elements, output_format, url)
+            return Response(stream_with_context(body), mimetype=FORMATS[output_format][0])
         
-        # Save to temporary file
-        temp_file = tempfile.NamedTemporaryFile(
-            mode='w', 
-            suffix='.html', 
-            delete=False, 
-            encoding='utf-8'
-        )
-        temp_file.write(html_output)
-        temp_file.close()
+        job = job_queue.submit(url)
         
         return jsonify({
             'success': True,
-            'message': 'Analysis completed successfully!',
-            'download_url': f'/download/{os.path.basename(temp_file.name)}'
-        })
+            'job_id': job.id,
+            'status_url': f'/jobs/{job.id}'
+        }), 202
         
+    except QueueFull as e:
+        return overloaded(admission.reject(str(e), job_queue.queued()))
+    except Overloaded as e:
+        return overloaded(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/download/<filename>')
-def download_file(filename):
-    """Download the generated HTML file."""
-    try:
-        temp_dir = tempfile.gettempdir()
-        file_path = os.path.join(temp_dir, filename)
-        
-        if os.path.exists(file_path):
-            return send_file(
-                file_path,
-                as_attachment=True,
-                download_name='non_polish_text_results.html',
-                mimetype='text/html'
-            )
-        else:
-            return "File not found", 404
-            
-    except Exception as e:
-        return f"Error downloading file: {str(e)}", 500
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Report the status and progress of an analysis job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running analysis job."""
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+def timed_report(elements, output_format: str = 'html', url=None):
+    """Stream a report, recording the time spent as the render stage."""
+    extractor = get_extractor()
+    with extractor.timed_stage('render'):
+        yield from extractor.iter_report(elements, output_format, url)
+
+@app.route('/download/<result_key>')
+def download_file(result_key):
+    """Stream the report for a stored analysis result (HTML unless ?format= says otherwise)."""
+    output_format = request.args.get('format', 'html').lower()
+    if output_format not in FORMATS:
+        return "Unknown format", 400
+    elements = result_store.get(result_key)
+    if elements is None:
+        return "File not found", 404
+    
+    mimetype, extension = FORMATS[output_format]
+    return Response(
+        stream_with_context(timed_report(elements, output_format)),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename=non_polish_text_results.{extension}'
+        }
+    )
+
+@app.route('/metrics')
+def metrics():
+    """Expose pipeline, cache and queue metrics in the Prometheus text format."""
+    caches = language_cache_stats()
+    admission_stats = admission.stats()
+    if _extractor is not None and _extractor.adjudicator is not None:
+        caches['llm'] = _extractor.adjudicator.cache.stats()
+    extra = [
+        ('language_cache_hits_total', 'Language cache lookups that hit.', 'counter',
+         [({'cache': name}, stats['hits']) for name, stats in caches.items()]),
+        ('language_cache_misses_total', 'Language cache lookups that missed.', 'counter',
+         [({'cache': name}, stats['misses']) for name, stats in caches.items()]),
+        ('language_cache_entries', 'Entries held by each language cache.', 'gauge',
+         [({'cache': name}, stats['size']) for name, stats in caches.items()]),
+        ('analysis_slots', 'Analyses running and requests waiting for a slot.', 'gauge',
+         [({'state': 'in_flight'}, admission_stats['in_flight']),
+          ({'state': 'waiting'}, admission_stats['waiting'])]),
+        ('analysis_rejected_total', 'Requests answered with 429, by reason.', 'counter',
+         [({'reason': 'overloaded'}, admission_stats['rejected']),
+          ({'reason': 'rate_limited'}, rate_limiter.rejected)]),
+        ('analysis_jobs', 'Known analysis jobs by status.', 'gauge',
+         [({'status': status}, count) for status, count in sorted(job_queue.status_counts().items())]),
+    ]
+    stores = [('results', result_store.stats())]
+    # Do not build the extractor just to report on its cache
+    if _extractor is not None and _extractor.http_cache is not None:
+        stores.append(('http', _extractor.http_cache.stats()))
+    extra += [
+        ('store_entries', 'Entries in the result and HTTP caches.', 'gauge',
+         [({'store': name}, stats['entries']) for name, stats in stores]),
+        ('store_bytes', 'Bytes used by the result and HTTP caches.', 'gauge',
+         [({'store': name}, stats['bytes']) for name, stats in stores]),
+    ]
+    return Response(render_prometheus(extra=extra),
+                    mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Development server; use server.py for production
+    app.run(host='0.0.0.0', port=5000, debug=os.environ.get('FLASK_DEBUG') == '1')
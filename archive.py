@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Offline Archive Processor
+
+Analyzes pages that were already downloaded instead of fetching them:
+a directory of saved HTML files, a tarball of them, or a WARC file
+(``.warc`` or per-record gzipped ``.warc.gz``). Archives are read as a
+stream, one document at a time; directory files are read by the workers
+themselves. Extraction and classification run in a process pool with a
+bounded number of documents in flight.
+
+Results are written as NDJSON, one line per document:
+``{"id", "url", "count", "results": [...]}`` or ``{"id", "url", "error"}``.
+Documents already in the output file are skipped, so an interrupted run
+resumes where it stopped; documents that failed are tried again and get a
+new record.
+"""
+
+import os
+import gzip
+import json
+import time
+import zlib
+import tarfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import BinaryIO, Dict, Iterator, Optional, Set, Tuple
+
+from serializers import element_record
+
+# Saved page file names worth analyzing (optionally gzipped)
+HTML_EXTENSIONS = ('.html', '.htm', '.xhtml', '.shtml')
+
+# Longest HTTP response head read from a WARC record before giving up on it
+MAX_HTTP_HEAD = 64 * 1024
+
+# (id, url or None, body bytes or None to read the file at id, Content-Type or None).
+# Without a URL the document is a saved file, gunzipped by the worker if named .gz
+Document = Tuple[str, Optional[str], Optional[bytes], Optional[str]]
+
+
+def is_html_name(name: str) -> bool:
+    """Whether a file name looks like a saved HTML page."""
+    name = name.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return name.endswith(HTML_EXTENSIONS)
+
+
+def is_warc(path: str) -> bool:
+    return path.lower().endswith(('.warc', '.warc.gz'))
+
+
+def decompress_name(name: str, body: bytes, max_bytes: int) -> bytes:
+    """Gunzip the body of a ``.gz`` file, keeping at most ``max_bytes`` of
+    it; a body cut off at its compressed size yields what it holds."""
+    if not name.lower().endswith('.gz'):
+        return body
+    return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body, max_bytes)
+
+
+def iter_directory(path: str) -> Iterator[Document]:
+    """Saved pages under a directory, in sorted order; workers read the files."""
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if is_html_name(name):
+                file_path = os.path.join(root, name)
+                yield os.path.relpath(file_path, path), None, None, None
+
+
+def iter_tarball(path: str, max_bytes: int) -> Iterator[Document]:
+    """Saved pages in a (possibly compressed) tarball, read as a stream."""
+    with tarfile.open(path, 'r|*') as archive:
+        for member in archive:
+            if not member.isfile() or not is_html_name(member.name):
+                continue
+            f = archive.extractfile(member)
+            if f is None:
+                continue
+            yield member.name, None, f.read(max_bytes), None
+
+
+def read_headers(stream: BinaryIO) -> Dict[str, str]:
+    """Read 'Name: value' lines up to a blank line; names are lowercased."""
+    headers = {}
+    while True:
+        line = stream.readline()
+        if not line or not line.strip():
+            return headers
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+
+def dechunk(body: bytes) -> bytes:
+    """Undo HTTP chunked transfer encoding, keeping what parses of a truncated body."""
+    out = bytearray()
+    position = 0
+    while position < len(body):
+        line_end = body.find(b'\r\n', position)
+        if line_end == -1:
+            break
+        try:
+            size = int(body[position:line_end].split(b';')[0], 16)
+        except ValueError:
+            break
+        if size == 0:
+            break
+        out += body[line_end + 2:line_end + 2 + size]
+        position = line_end + 2 + size + 2
+    return bytes(out)
+
+
+def read_http_head(stream: BinaryIO, length: int) -> Optional[bytes]:
+    """Read the status line and headers of an HTTP message of ``length``
+    bytes, up to and including the blank line; None if they do not end
+    within MAX_HTTP_HEAD bytes."""
+    head = bytearray()
+    limit = min(length, MAX_HTTP_HEAD)
+    while len(head) < limit:
+        line = stream.readline(limit - len(head))
+        if not line:
+            break
+        head += line
+        if not line.strip():
+            return bytes(head)
+    return None
+
+
+def parse_http_head(head: bytes) -> Tuple[Optional[int], Dict[str, str]]:
+    """Split an HTTP response head into (status, headers); names are lowercased."""
+    lines = head.splitlines()
+    parts = lines[0].split(None, 2) if lines else []
+    status = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return status, headers
+
+
+def decode_http_body(headers: Dict[str, str], body: bytes, max_bytes: int) -> bytes:
+    """Undo chunked transfer and gzip/deflate content encoding, keeping at
+    most ``max_bytes`` of decoded body."""
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        body = dechunk(body)
+    encoding = headers.get('content-encoding', '').lower()
+    try:
+        if encoding in ('gzip', 'x-gzip'):
+            body = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body, max_bytes)
+        elif encoding == 'deflate':
+            body = zlib.decompressobj().decompress(body, max_bytes)
+    except zlib.error:
+        pass
+    return body[:max_bytes]
+
+
+def skip(stream: BinaryIO, count: int):
+    """Move past ``count`` bytes of a record without reading them into memory."""
+    if count > 0:
+        stream.seek(count, os.SEEK_CUR)
+
+
+def iter_warc(path: str, max_bytes: int) -> Iterator[Document]:
+    """HTML responses and resources in a WARC file, read record by record.
+
+    Record types and content types are checked before a record's block is
+    read; other records are skipped, and at most ``max_bytes`` of a kept
+    record's payload is read.
+    """
+    opener = gzip.open if path.lower().endswith('.gz') else open
+    with opener(path, 'rb') as stream:
+        while True:
+            line = stream.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            if not line.startswith(b'WARC/'):
+                raise Exception(f"Not a WARC record at offset {stream.tell()} of {path}")
+            headers = read_headers(stream)
+            length = int(headers.get('content-length', 0))
+            end = stream.tell() + length
+
+            record_type = headers.get('warc-type')
+            record_id = headers.get('warc-record-id') or f"{path}@{end}"
+            url = headers.get('warc-target-uri')
+            content_type = headers.get('content-type', '')
+            if record_type == 'response' and content_type.startswith('application/http'):
+                head = read_http_head(stream, length)
+                if head is not None:
+                    status, http_headers = parse_http_head(head)
+                    page_type = http_headers.get('content-type', '')
+                    if status is not None and 200 <= status < 300 and 'html' in page_type.lower():
+                        body = stream.read(min(end - stream.tell(), max_bytes))
+                        skip(stream, end - stream.tell())
+                        yield record_id, url, decode_http_body(http_headers, body, max_bytes), page_type
+                        continue
+            elif record_type == 'resource' and 'html' in content_type.lower():
+                block = stream.read(min(length, max_bytes))
+                skip(stream, end - stream.tell())
+                yield record_id, url, block, content_type
+                continue
+            skip(stream, end - stream.tell())
+
+
+def iter_archive(path: str, max_bytes: int) -> Iterator[Document]:
+    """Documents of a directory, tarball or WARC file."""
+    if os.path.isdir(path):
+        return iter_directory(path)
+    if is_warc(path):
+        return iter_warc(path, max_bytes)
+    if tarfile.is_tarfile(path):
+        return iter_tarball(path, max_bytes)
+    raise Exception(f"Not a directory, tarball or WARC file: {path}")
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """IDs already analyzed in an output file, leaving out failed ones; a
+    torn last line is cut off."""
+    done = set()
+    try:
+        f = open(output_path, 'rb+')
+    except FileNotFoundError:
+        return done
+    with f:
+        valid_end = 0
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(line)
+                if 'error' not in record:
+                    done.add(record['id'])
+            except (ValueError, KeyError, TypeError):
+                break
+            valid_end += len(line)
+        f.truncate(valid_end)
+    return done
+
+
+# Extractor of an archive worker process
+_archive_extractor = None
+
+
+def _init_archive_worker(options: dict):
+    """Prepare an archive worker: load langdetect once and build an extractor."""
+    global _archive_extractor
+    from web_scraper import WebTextExtractor, load_language_profiles
+    load_language_profiles()
+    _archive_extractor = WebTextExtractor(verbose=False, **options)
+
+
+def _analyze_document(root: str, document: Document) -> dict:
+    """Analyze one document in a worker and return its output record."""
+    doc_id, url, body, content_type = document
+    record = {'id': doc_id, 'url': url}
+    extractor = _archive_extractor
+    try:
+        if body is None:
+            with open(os.path.join(root, doc_id), 'rb') as f:
+                body = f.read(extractor.max_bytes)
+        if url is None:
+            body = decompress_name(doc_id, body, extractor.max_bytes)
+        encoding = extractor.resolve_encoding(content_type, body)
+        elements = extractor.filter_non_polish(extractor.parse_text_elements(body, encoding))
+    except Exception as e:
+        record['error'] = str(e)
+        return record
+    record['count'] = len(elements)
+    record['results'] = [element_record(i, element) for i, element in enumerate(elements, 1)]
+    return record
+
+
+class ArchiveProcessor:
+    """Runs archive documents through a process pool into an NDJSON file."""
+
+    # Seconds between progress lines
+    PROGRESS_INTERVAL = 5.0
+
+    def __init__(self, workers: int = 4, extractor_options: Optional[dict] = None,
+                 max_bytes: int = 10 * 1024 * 1024, verbose: bool = True):
+        """
+        ``extractor_options`` are WebTextExtractor arguments for the workers
+        (extraction_mode, parser, language_backend). At most four documents
+        per worker are in flight, which bounds memory on large archives.
+        """
+        self.workers = max(1, workers)
+        self.extractor_options = dict(extractor_options or {}, max_bytes=max_bytes)
+        self.max_bytes = max_bytes
+        self.verbose = verbose
+
+    def log(self, message: str):
+        if self.verbose:
+            print(message)
+
+    def process(self, path: str, output_path: str) -> dict:
+        """Analyze every document of an archive not yet in ``output_path``.
+
+        Returns counts of processed, skipped and failed documents, the
+        elapsed seconds and the documents per second.
+        """
+        done = completed_ids(output_path)
+        if done:
+            self.log(f"Resuming: {len(done)} document(s) already in {output_path}")
+        root = path if os.path.isdir(path) else ''
+        stats = {'processed': 0, 'skipped': 0, 'failed': 0}
+        start = last_report = time.perf_counter()
+        max_pending = self.workers * 4
+
+        with open(output_path, 'a', encoding='utf-8') as out, \
+                ProcessPoolExecutor(max_workers=self.workers,
+                                    initializer=_init_archive_worker,
+                                    initargs=(self.extractor_options,)) as executor:
+            pending = set()
+
+            def collect(futures):
+                nonlocal last_report
+                for future in futures:
+                    record = future.result()
+                    out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    stats['processed'] += 1
+                    if 'error' in record:
+                        stats['failed'] += 1
+                out.flush()
+                now = time.perf_counter()
+                if now - last_report >= self.PROGRESS_INTERVAL:
+                    last_report = now
+                    rate = stats['processed'] / (now - start)
+                    self.log(f"  {stats['processed']} document(s), {rate:.1f} docs/s")
+
+            for document in iter_archive(path, self.max_bytes):
+                if document[0] in done:
+                    stats['skipped'] += 1
+                    continue
+                done.add(document[0])
+                pending.add(executor.submit(_analyze_document, root, document))
+                if len(pending) >= max_pending:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+            collect(pending)
+
+        stats['seconds'] = time.perf_counter() - start
+        stats['docs_per_second'] = stats['processed'] / stats['seconds'] if stats['seconds'] else 0.0
+        return stats
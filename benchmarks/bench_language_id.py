@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Language Identification Backend Benchmark
+
+Checks how often the vectorized n-gram identifier agrees with langdetect and
+compares their speed, both for raw identification and for the full
+filter_non_polish cascade.
+
+Usage:
+    python benchmarks/bench_language_id.py [FILE_OR_DIR ...] [--min-agreement PCT]
+
+Snippets are extracted from the given HTML pages (by default the HTML files
+shipped in the repository) plus a built-in multilingual sample. The script
+exits non-zero if agreement drops below --min-agreement.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from web_scraper import WebTextExtractor, LANGUAGE_CACHE, LANGDETECT_CACHE
+from bench_parsers import collect_pages, default_pages
+
+# Short multilingual sample so agreement is not measured on English alone
+SAMPLE_TEXTS = [
+    "The quick brown fox jumps over the lazy dog near the river bank.",
+    "Sign in to your account to manage your orders and subscriptions.",
+    "Der schnelle braune Fuchs springt über den faulen Hund am Flussufer.",
+    "Melden Sie sich an, um Ihre Bestellungen zu verwalten.",
+    "Le renard brun rapide saute par-dessus le chien paresseux.",
+    "Connectez-vous pour gérer vos commandes et abonnements.",
+    "El rápido zorro marrón salta sobre el perro perezoso.",
+    "Inicia sesión para gestionar tus pedidos y suscripciones.",
+    "La volpe marrone veloce salta sopra il cane pigro.",
+    "Accedi per gestire i tuoi ordini e abbonamenti.",
+    "A rápida raposa marrom pula sobre o cão preguiçoso.",
+    "De snelle bruine vos springt over de luie hond.",
+    "Den snabba bruna räven hoppar över den lata hunden.",
+    "Rychlá hnědá liška skáče přes líného psa u řeky.",
+    "Rýchla hnedá líška skáče cez lenivého psa pri rieke.",
+    "Быстрая коричневая лиса прыгает через ленивую собаку.",
+    "Швидка бура лисиця стрибає через ледачого пса.",
+    "Szybki brązowy lis przeskakuje nad leniwym psem.",
+    "Zaloguj się, aby zarządzać zamówieniami i subskrypcjami.",
+    "Hızlı kahverengi tilki tembel köpeğin üzerinden atlar.",
+]
+
+
+def snippets_from(pages):
+    """Extract unique text snippets from HTML pages."""
+    extractor = WebTextExtractor(verbose=False)
+    texts = list(SAMPLE_TEXTS)
+    seen = set(texts)
+    for page in pages:
+        with open(page, 'rb') as f:
+            for _, text in extractor.parse_text_elements(f.read(), 'utf-8'):
+                if text not in seen:
+                    seen.add(text)
+                    texts.append(text)
+    return texts
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare language identification backends.")
+    parser.add_argument('paths', nargs='*', help="HTML files or directories")
+    parser.add_argument('--min-agreement', type=float, default=90.0,
+                        help="fail below this percentage of agreement (default: 90)")
+    args = parser.parse_args()
+
+    pages = collect_pages(args.paths) if args.paths else default_pages()
+    texts = [text for text in snippets_from(pages) if len(text) >= 10]
+    print(f"{len(texts)} snippets from {len(pages)} page(s)")
+
+    langdetect = WebTextExtractor(verbose=False)
+    ngram = WebTextExtractor(verbose=False, language_backend='ngram')
+    _, load_seconds = timed(ngram.ngram_identifier)
+    print(f"ngram profile tables loaded in {load_seconds * 1000:.0f} ms")
+
+    # Raw identification, no caching involved
+    reference, langdetect_seconds = timed(lambda: [langdetect.langdetect(t) for t in texts])
+    identified, ngram_seconds = timed(ngram.ngram_identifier().identify, texts)
+    agreeing = sum(1 for expected, (lang, _) in zip(reference, identified) if expected == lang)
+    agreement = 100.0 * agreeing / len(texts)
+
+    print(f"{'backend':<12} {'seconds':>9} {'snippets/s':>11}")
+    for name, seconds in (('langdetect', langdetect_seconds), ('ngram', ngram_seconds)):
+        print(f"{name:<12} {seconds:>9.3f} {len(texts) / seconds:>11.0f}")
+    print(f"Agreement with langdetect: {agreement:.1f}% ({agreeing}/{len(texts)})")
+
+    disagreements = [(text, expected, lang) for text, expected, (lang, _)
+                     in zip(texts, reference, identified) if expected != lang]
+    for text, expected, lang in disagreements[:10]:
+        print(f"  langdetect={expected} ngram={lang}: {text[:70]}")
+
+    # Full cascade, starting from cold verdict caches for each backend
+    elements = [('p', text) for text in texts]
+    for name, extractor in (('langdetect', langdetect), ('ngram', ngram)):
+        LANGUAGE_CACHE.clear()
+        LANGDETECT_CACHE.clear()
+        _, seconds = timed(extractor.filter_non_polish, elements)
+        print(f"filter_non_polish with {name}: {seconds:.3f} s")
+
+    if agreement < args.min_agreement:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
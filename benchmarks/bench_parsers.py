@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Parser Backend Benchmark
+
+Compares the parse + text extraction stage of each WebTextExtractor parser
+backend on saved HTML pages: wall time, peak traced memory, and whether the
+extracted (tag, text) tuples are identical to the html.parser baseline.
+
+Usage:
+    python benchmarks/bench_parsers.py [FILE_OR_DIR ...] [--scale N] [--repeat N]
+
+Without paths, the HTML files shipped in the repository are used. --scale
+repeats each page's <body> content N times to simulate larger pages.
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from web_scraper import WebTextExtractor
+
+
+def default_pages():
+    """HTML files that ship with the repository."""
+    pages = [os.path.join(ROOT, 'non_polish_text_results.html')]
+    assets = os.path.join(ROOT, 'attached_assets')
+    pages += sorted(os.path.join(assets, name) for name in os.listdir(assets)
+                    if name.endswith('.html'))
+    return pages
+
+
+def collect_pages(paths):
+    """Expand directories into the HTML files they contain."""
+    pages = []
+    for path in paths:
+        if os.path.isdir(path):
+            pages += sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.endswith(('.html', '.htm')))
+        else:
+            pages.append(path)
+    return pages
+
+
+def scale_page(body: bytes, scale: int) -> bytes:
+    """Repeat the <body> content of a page to make it larger."""
+    if scale <= 1:
+        return body
+    match = re.search(rb'<body[^>]*>(.*)</body>', body, re.DOTALL | re.IGNORECASE)
+    if not match:
+        return body * scale
+    content = match.group(1)
+    return body[:match.start(1)] + content * scale + body[match.end(1):]
+
+
+def measure(extractor, body, repeat):
+    """Best-of-N wall time and peak traced memory for one backend."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        elements = extractor.parse_text_elements(body, 'utf-8')
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    extractor.parse_text_elements(body, 'utf-8')
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elements, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends.")
+    parser.add_argument('paths', nargs='*', help="HTML files or directories")
+    parser.add_argument('--scale', type=int, default=1,
+                        help="repeat each page body N times (default: 1)")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="timing runs per backend, best is reported (default: 3)")
+    args = parser.parse_args()
+
+    pages = collect_pages(args.paths) if args.paths else default_pages()
+    backends = []
+    for name in WebTextExtractor.PARSERS:
+        extractor = WebTextExtractor(parser=name, verbose=False)
+        try:
+            extractor.parse_text_elements(b'<p>probe</p>', 'utf-8')
+        except Exception as e:
+            print(f"Skipping {name}: {e}")
+            continue
+        backends.append((name, extractor))
+
+    print(f"{'page':<40} {'backend':<12} {'KB':>8} {'ms':>9} {'peak MB':>9} {'elements':>9}  same")
+    mismatches = 0
+    for page in pages:
+        with open(page, 'rb') as f:
+            body = scale_page(f.read(), args.scale)
+
+        baseline = None
+        for name, extractor in backends:
+            elements, seconds, peak = measure(extractor, body, args.repeat)
+            if baseline is None:
+                baseline = elements
+            same = elements == baseline
+            mismatches += not same
+            print(f"{os.path.basename(page)[:40]:<40} {name:<12} {len(body) / 1024:>8.0f} "
+                  f"{seconds * 1000:>9.1f} {peak / 1024 / 1024:>9.1f} {len(elements):>9}  "
+                  f"{'yes' if same else 'NO'}")
+
+    if mismatches:
+        print(f"\n{mismatches} backend result(s) differ from {backends[0][0]}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
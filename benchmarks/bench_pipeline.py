@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Offline Pipeline Benchmark
+
+Runs each WebTextExtractor stage over the saved pages in benchmarks/corpus
+(Polish and mixed-language pages of varying size) and reports per-stage
+wall time, throughput in snippets per second and peak traced memory. Pages
+are fetched from a local HTTP server, so no network access is needed.
+
+Stages: fetch, parse, extract, is_polish_text, detect_language,
+filter_non_polish, generate_html_table. Language caches are cleared before
+every classification stage so each one measures cold work.
+
+Usage:
+    python benchmarks/bench_pipeline.py [FILE_OR_DIR ...] [--repeat N]
+        [--parser NAME] [--language-backend NAME]
+        [--save-baseline] [--max-regression PCT]
+
+Results are compared against benchmarks/baselines.json when it holds an
+entry for the same parser/backend combination; --save-baseline records the
+current run there instead.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import threading
+import tracemalloc
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from web_scraper import (WebTextExtractor, LANGUAGE_CACHE, LANGDETECT_CACHE,
+                         load_language_profiles)
+from bench_parsers import collect_pages
+
+CORPUS_DIR = os.path.join(ROOT, 'benchmarks', 'corpus')
+BASELINES_PATH = os.path.join(ROOT, 'benchmarks', 'baselines.json')
+
+STAGES = ('fetch', 'parse', 'extract', 'is_polish_text', 'detect_language',
+          'filter_non_polish', 'generate_html_table')
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler that does not log every request."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory):
+    """Serve a directory on a free local port; returns the server."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def clear_language_caches():
+    LANGUAGE_CACHE.clear()
+    LANGDETECT_CACHE.clear()
+
+
+def page_stages(extractor, url):
+    """Yield (stage, function) pairs for one page; each function returns its output.
+
+    Later stages reuse the outputs of earlier ones, which are computed once
+    up front so every stage can be timed and traced in isolation.
+    """
+    body, encoding, _ = extractor.fetch_document(url)
+    if extractor.parser == 'stream':
+        soup = None
+        elements = extractor.stream_text_elements(body, encoding)
+    else:
+        soup = extractor.parse_html(body, encoding)
+        elements = extractor.extract_text_elements(soup)
+    texts = [text for _, text in elements]
+    non_polish = extractor.filter_non_polish(elements)
+
+    def cold(function):
+        def run():
+            clear_language_caches()
+            return function()
+        return run
+
+    yield 'fetch', lambda: extractor.fetch_document(url)
+    if soup is None:
+        yield 'extract', lambda: extractor.stream_text_elements(body, encoding)
+    else:
+        yield 'parse', lambda: extractor.parse_html(body, encoding)
+        yield 'extract', lambda: extractor.extract_text_elements(soup)
+    yield 'is_polish_text', cold(lambda: [extractor.is_polish_text(t) for t in texts])
+    yield 'detect_language', cold(lambda: [extractor.detect_language(t) for t in texts])
+    yield 'filter_non_polish', cold(lambda: extractor.filter_non_polish(elements))
+    yield 'generate_html_table', lambda: extractor.generate_html_table(non_polish)
+    # Snippet count for throughput, reported through a pseudo-stage
+    yield None, len(elements)
+
+
+def measure(function, repeat):
+    """Median wall time over ``repeat`` runs, then peak traced memory of one run."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def run(pages, extractor, repeat):
+    """Benchmark every page; returns per-stage totals and the snippet count."""
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in pages])
+    server = serve(root)
+    base = f"http://127.0.0.1:{server.server_address[1]}/"
+    totals = {stage: {'seconds': 0.0, 'peak_bytes': 0} for stage in STAGES}
+    snippets = 0
+    try:
+        for page in pages:
+            url = base + quote(os.path.relpath(os.path.abspath(page), root).replace(os.sep, '/'))
+            for stage, function in page_stages(extractor, url):
+                if stage is None:
+                    snippets += function
+                    continue
+                seconds, peak = measure(function, repeat)
+                totals[stage]['seconds'] += seconds
+                totals[stage]['peak_bytes'] = max(totals[stage]['peak_bytes'], peak)
+    finally:
+        server.shutdown()
+
+    return {stage: values for stage, values in totals.items()
+            if values['seconds'] or values['peak_bytes']}, snippets
+
+
+def load_baselines():
+    try:
+        with open(BASELINES_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the extraction pipeline offline.")
+    parser.add_argument('paths', nargs='*', help="HTML files or directories (default: benchmarks/corpus)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per stage (default: 3)")
+    parser.add_argument('--parser', choices=WebTextExtractor.PARSERS, default='html.parser')
+    parser.add_argument('--language-backend', choices=WebTextExtractor.LANGUAGE_BACKENDS,
+                        default='langdetect')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="store this run as the baseline for its configuration")
+    parser.add_argument('--max-regression', type=float, metavar='PCT',
+                        help="exit non-zero if a stage is more than PCT%% slower than the baseline")
+    args = parser.parse_args()
+
+    pages = collect_pages(args.paths or [CORPUS_DIR])
+    extractor = WebTextExtractor(verbose=False, parser=args.parser,
+                                 language_backend=args.language_backend)
+    start = time.perf_counter()
+    load_language_profiles()
+    if args.language_backend == 'ngram':
+        extractor.ngram_identifier()
+    print(f"Language profiles loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    stages, snippets = run(pages, extractor, args.repeat)
+    extractor.close()
+    key = f"{args.parser}/{args.language_backend}"
+    size = sum(os.path.getsize(page) for page in pages)
+    print(f"{len(pages)} page(s), {size / 1024:.0f} KiB, {snippets} snippets [{key}]\n")
+
+    baselines = load_baselines()
+    baseline = baselines.get(key, {}).get('stages', {}) if not args.paths else {}
+
+    print(f"{'stage':<22} {'seconds':>9} {'snippets/s':>11} {'peak KiB':>9} {'vs baseline':>12}")
+    regressions = []
+    for stage, values in stages.items():
+        seconds = values['seconds']
+        rate = snippets / seconds if seconds else float('inf')
+        change = ''
+        if stage in baseline and baseline[stage]['seconds']:
+            delta = 100.0 * (seconds / baseline[stage]['seconds'] - 1)
+            change = f"{delta:+.0f}%"
+            if args.max_regression is not None and delta > args.max_regression:
+                regressions.append(stage)
+        print(f"{stage:<22} {seconds:>9.4f} {rate:>11.0f} "
+              f"{values['peak_bytes'] / 1024:>9.0f} {change:>12}")
+
+    if args.save_baseline:
+        if args.paths:
+            sys.exit("Baselines are only stored for the checked-in corpus")
+        baselines[key] = {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'pages': len(pages),
+            'snippets': snippets,
+            'stages': stages,
+        }
+        with open(BASELINES_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline saved to {os.path.relpath(BASELINES_PATH, ROOT)}")
+
+    if regressions:
+        print(f"\nSlower than baseline by more than {args.max_regression:.0f}%: "
+              f"{', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
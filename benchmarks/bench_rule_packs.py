@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Rule Pack Loading Benchmark
+
+Measures what a fresh process pays to get its home-language rules ready,
+from the compiled artifact (``rule_packs/compiled.bin``) and from the
+JSON pack sources. Each run starts a new interpreter, so nothing is
+cached between runs. Reported per source:
+
+- load: reading the tables (marshal, or JSON parsing plus compilation)
+- ready: load plus building the rules, including their regular expressions
+
+Usage:
+    python benchmarks/bench_rule_packs.py [--languages pl,cs,sk] [--repeat N]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter: argv = 'artifact' or 'json', comma-separated languages
+CHILD = r'''
+import json, os, sys, time
+sys.path.insert(0, os.getcwd())
+import rule_packs
+
+source, languages = sys.argv[1], sys.argv[2].split(',')
+start = time.perf_counter()
+if source == 'artifact':
+    packs = rule_packs.read_artifact()
+    if packs is None:
+        sys.exit("The artifact is missing or stale; run python rule_packs.py")
+else:
+    packs = rule_packs.compile_sources()[0]
+loaded = time.perf_counter()
+rules = [rule_packs.CompiledLanguageRules(packs[language]) for language in languages]
+ready = time.perf_counter()
+print(json.dumps({'load': loaded - start, 'ready': ready - start}))
+'''
+
+
+def run(source, languages):
+    result = subprocess.run([sys.executable, '-c', CHILD, source, languages],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare loading rule packs from the artifact and from JSON.")
+    parser.add_argument('--languages', default='pl,cs,sk', help="packs to load (default: pl,cs,sk)")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per source (default: 5)")
+    args = parser.parse_args()
+
+    subprocess.run([sys.executable, 'rule_packs.py'], cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL)
+    print(f"{'source':<9} {'load ms':>8} {'ready ms':>9}")
+    for source in ('artifact', 'json'):
+        runs = [run(source, args.languages) for _ in range(args.repeat)]
+        load = statistics.median(r['load'] for r in runs) * 1000
+        ready = statistics.median(r['ready'] for r in runs) * 1000
+        print(f"{source:<9} {load:>8.2f} {ready:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
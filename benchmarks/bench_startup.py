@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Startup Time Benchmark
+
+Guards the import cost of web_scraper: measures ``python -X importtime``
+for the module and the wall time of ``web_scraper.py --help``, and checks
+that heavy libraries are not imported until their feature is used.
+
+Usage:
+    python benchmarks/bench_startup.py [--budget-ms N] [--repeat N]
+
+Exits non-zero if the median import time exceeds the budget or a lazily
+imported library is loaded at import time.
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that must only be imported when their feature is used
+LAZY_MODULES = ('requests', 'bs4', 'langdetect', 'numpy', 'openai', 'textblob',
+                'concurrent.futures.process')
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+
+def import_profile(module):
+    """Return ({module: cumulative microseconds}, top-level cumulative) for one import."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+    return modules, modules.get(module, 0)
+
+
+def help_time():
+    """Wall time of running the CLI with --help."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, 'web_scraper.py', '--help'], cwd=ROOT,
+                   stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check web_scraper startup cost.")
+    parser.add_argument('--budget-ms', type=float, default=150.0,
+                        help="maximum median import time of web_scraper (default: 150)")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="runs to take the median of (default: 5)")
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.repeat):
+        modules, cumulative = import_profile('web_scraper')
+        samples.append(cumulative / 1000)
+    import_ms = statistics.median(samples)
+    help_ms = statistics.median(help_time() for _ in range(args.repeat)) * 1000
+
+    print(f"import web_scraper: {import_ms:.1f} ms (median of {args.repeat}, budget {args.budget_ms:.0f} ms)")
+    print(f"web_scraper.py --help: {help_ms:.1f} ms")
+
+    # Modules the interpreter loads anyway (site hooks etc.) are not our cost
+    baseline, _ = import_profile('sys')
+    slowest = sorted(((us, name) for name, us in modules.items()
+                      if name not in baseline and name != 'web_scraper'
+                      and '.' not in name), reverse=True)[:5]
+    print("Slowest imports added by web_scraper:")
+    for us, name in slowest:
+        print(f"  {name:<24} {us / 1000:>7.1f} ms")
+
+    failed = False
+    eager = [name for name in LAZY_MODULES if name in modules]
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+        failed = True
+    if import_ms > args.budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
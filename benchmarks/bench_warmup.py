@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Worker Warm-Up Benchmark
+
+Measures what a fresh web worker pays on its first analysis. Each run
+starts a new interpreter that imports the extractor, optionally runs
+``warm_up()`` the way server.py does before forking, then forks a child
+(a stand-in for a prefork worker) that analyzes a corpus page twice.
+Reported per mode:
+
+- first: latency of the child's first analysis
+- steady: latency of the same analysis with language caches cleared, i.e.
+  the work every analysis does once everything is loaded
+- private: memory the child had to copy from the parent (Private_Dirty,
+  Linux only) by the end of the first analysis
+
+Usage:
+    python benchmarks/bench_warmup.py [PAGE] [--repeat N] [--language-backend NAME]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_PAGE = os.path.join(ROOT, 'benchmarks', 'corpus', 'pl_news_medium.html')
+
+# Runs in a fresh interpreter: argv = page path, backend, 'warm' or 'cold'
+CHILD = r'''
+import gc, json, os, sys, time
+sys.path.insert(0, os.getcwd())
+from web_scraper import WebTextExtractor, LANGUAGE_CACHE, LANGDETECT_CACHE, warm_up
+
+page, backend, mode = sys.argv[1:4]
+with open(page, 'rb') as f:
+    body = f.read()
+extractor = WebTextExtractor(verbose=False, language_backend=backend)
+if mode == 'warm':
+    warm_up(extractor)
+    gc.collect()
+    gc.freeze()
+
+def private_kb():
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Private_Dirty:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+read_fd, write_fd = os.pipe()
+pid = os.fork()
+if pid == 0:
+    before = private_kb()
+    start = time.perf_counter()
+    extractor.analyze_html(body, encoding='utf-8')
+    first = time.perf_counter() - start
+    after = private_kb()
+    LANGUAGE_CACHE.clear()
+    LANGDETECT_CACHE.clear()
+    start = time.perf_counter()
+    extractor.analyze_html(body, encoding='utf-8')
+    steady = time.perf_counter() - start
+    private = after - before if before is not None and after is not None else None
+    os.write(write_fd, json.dumps({'first': first, 'steady': steady, 'private_kb': private}).encode())
+    os._exit(0)
+os.close(write_fd)
+os.waitpid(pid, 0)
+print(os.read(read_fd, 4096).decode())
+'''
+
+
+def run(page, backend, mode):
+    result = subprocess.run([sys.executable, '-c', CHILD, page, backend, mode],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare first-request latency of cold and warmed workers.")
+    parser.add_argument('page', nargs='?', default=CORPUS_PAGE, help="HTML file to analyze")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per mode (default: 3)")
+    parser.add_argument('--language-backend', default='langdetect',
+                        help="language backend (default: langdetect)")
+    args = parser.parse_args()
+
+    if not hasattr(os, 'fork'):
+        sys.exit("This benchmark needs os.fork")
+
+    print(f"{'mode':<6} {'first ms':>9} {'steady ms':>10} {'private KiB':>12}")
+    for mode in ('cold', 'warm'):
+        runs = [run(args.page, args.language_backend, mode) for _ in range(args.repeat)]
+        first = statistics.median(r['first'] for r in runs) * 1000
+        steady = statistics.median(r['steady'] for r in runs) * 1000
+        private = [r['private_kb'] for r in runs if r['private_kb'] is not None]
+        private_text = f"{statistics.median(private):.0f}" if private else 'n/a'
+        print(f"{mode:<6} {first:>9.1f} {steady:>10.1f} {private_text:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Cross-Page Boilerplate Detection
+
+Pages of one site share their chrome: navigation, headers, footers and
+sidebars produce the same text blocks on every page. BoilerplateTracker
+fingerprints each extracted block by its tag path and normalized text,
+per host, so a block is classified only the first time it is seen on that
+host. Blocks found on at least ``min_pages`` pages are treated as
+site-wide and reported once instead of once per page.
+"""
+
+import hashlib
+import threading
+from urllib.parse import urlparse
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from metrics import PIPELINE_METRICS
+
+if TYPE_CHECKING:
+    from web_scraper import WebTextExtractor
+
+# (fingerprint, tag, language, text) for a non-Polish block of one page
+PageBlock = Tuple[str, str, str, str]
+
+
+class BoilerplateTracker:
+    """Per-host registry of text block fingerprints and their verdicts."""
+
+    def __init__(self, min_pages: int = 2):
+        self.min_pages = min_pages
+        self.lock = threading.Lock()
+        # host -> fingerprint -> [language, pages seen on]
+        self.hosts: Dict[str, Dict[str, list]] = {}
+
+    @staticmethod
+    def fingerprint(path: str, text: str) -> str:
+        """Fingerprint of a block: its tag path plus whitespace-normalized text."""
+        key = f"{path}\x00{' '.join(text.split())}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def host(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def analyze(self, extractor: 'WebTextExtractor', url: str, body: bytes,
+                encoding: str) -> List[PageBlock]:
+        """Analyze a page, classifying only blocks not yet seen on its host.
+
+        Returns every non-Polish block of the page with its fingerprint;
+        use ``split`` once all pages are in to separate site-wide blocks.
+        """
+        blocks = extractor.extract_blocks(body, encoding)
+        fingerprints = [self.fingerprint(path, text) for path, _, text in blocks]
+
+        with self.lock:
+            known = self.hosts.setdefault(self.host(url), {})
+            verdicts = {fp: known[fp][0] for fp in fingerprints if fp in known}
+
+        # Each new fingerprint is classified once, even if repeated on this page
+        new_blocks = {}
+        for fp, (_, _, text) in zip(fingerprints, blocks):
+            if fp not in verdicts:
+                new_blocks.setdefault(fp, text)
+        with extractor.timed_stage('classify'):
+            languages = extractor.classify_texts(list(new_blocks.values()))
+        verdicts.update(zip(new_blocks, languages))
+        reused = len(set(fingerprints)) - len(new_blocks)
+        if reused:
+            PIPELINE_METRICS.count_verdict('boilerplate', reused)
+
+        with self.lock:
+            for fp in set(fingerprints):
+                entry = known.get(fp)
+                if entry is None:
+                    known[fp] = [verdicts[fp], 1]
+                else:
+                    entry[1] += 1
+
+        page = [(fp, tag, verdicts[fp], text)
+                for fp, (_, tag, text) in zip(fingerprints, blocks)
+                if verdicts[fp] is not None and verdicts[fp] not in extractor.home_language_set]
+        PIPELINE_METRICS.count_page('analyzed', len(blocks), len(page))
+        return page
+
+    def is_site_wide(self, url: str, fingerprint: str) -> bool:
+        """Whether a block appeared on at least ``min_pages`` pages of the URL's host."""
+        if self.min_pages <= 0:
+            return False
+        with self.lock:
+            entry = self.hosts.get(self.host(url), {}).get(fingerprint)
+            return entry is not None and entry[1] >= self.min_pages
+
+    def pages_with(self, url: str, fingerprint: str) -> int:
+        """Number of pages of the URL's host a block was seen on."""
+        with self.lock:
+            entry = self.hosts.get(self.host(url), {}).get(fingerprint)
+            return entry[1] if entry is not None else 0
+
+    def split(self, pages: List[Tuple[str, Optional[List[PageBlock]]]]
+              ) -> Tuple[List[Optional[List[Tuple[str, str, str]]]],
+                         List[Tuple[str, str, str, int]]]:
+        """Separate site-wide blocks from page-specific ones.
+
+        Takes (url, blocks) per page and returns the page-specific
+        (tag, language, text) elements of each page (None stays None) plus
+        the site-wide blocks as (tag, language, text, page count), each
+        listed once in order of first appearance.
+        """
+        page_elements = []
+        site_wide = {}
+        for url, blocks in pages:
+            if blocks is None:
+                page_elements.append(None)
+                continue
+            elements = []
+            for fp, tag, language, text in blocks:
+                if self.is_site_wide(url, fp):
+                    if fp not in site_wide:
+                        site_wide[fp] = (tag, language, text, self.pages_with(url, fp))
+                else:
+                    elements.append((tag, language, text))
+            page_elements.append(elements)
+        return page_elements, list(site_wide.values())
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Site Crawler for the Non-Polish Text Extractor
+
+Checks a whole site instead of a single page: starting from a URL (or the
+pages listed in a sitemap.xml), it follows same-origin links level by
+level up to a depth and page limit, analyzes every page with a shared
+WebTextExtractor and aggregates the non-Polish findings into one report.
+
+Fetches run on a bounded thread pool; a HostScheduler additionally limits
+how many requests each host sees at once and spaces their start times by
+a politeness delay. URLs are canonicalized before deduplication, so
+``/a``, ``/a#top`` and ``HTTP://Example.com:80/a`` are crawled once.
+
+With a BoilerplateTracker, text blocks shared across pages (navigation,
+footers) are classified once per host and reported once as site-wide.
+"""
+
+import gzip
+import html
+import time
+import posixpath
+import threading
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from boilerplate import BoilerplateTracker
+    from web_scraper import WebTextExtractor
+
+# (url, depth, non-Polish elements or None, error message or None)
+CrawlPage = Tuple[str, int, Optional[List[Tuple[str, str, str]]], Optional[str]]
+
+# (tag, language, text, number of pages) for a block repeated across a site
+SiteWideBlock = Tuple[str, str, str, int]
+
+# Links to these are never HTML pages worth analyzing
+SKIPPED_EXTENSIONS = frozenset((
+    '.7z', '.avi', '.bmp', '.css', '.csv', '.doc', '.docx', '.exe', '.gif',
+    '.gz', '.ico', '.jpeg', '.jpg', '.js', '.json', '.mov', '.mp3', '.mp4',
+    '.pdf', '.png', '.ppt', '.pptx', '.rar', '.svg', '.tar', '.tgz', '.txt',
+    '.wav', '.webm', '.webp', '.woff', '.woff2', '.xls', '.xlsx', '.xml', '.zip',
+))
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL for deduplication.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    ``.``/``..`` segments, and sorts the query parameters.
+    """
+    parts = urlparse(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    normalized = posixpath.normpath(path)
+    if path.endswith('/') and normalized != '/':
+        normalized += '/'
+    # normpath keeps a leading '//', which would read as a host
+    path = '/' + normalized.lstrip('/')
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunparse((scheme, host, path, '', query, ''))
+
+
+def origin(url: str) -> Tuple[str, str]:
+    """The (scheme, host[:port]) pair a canonical URL belongs to."""
+    parts = urlparse(url)
+    return parts.scheme, parts.netloc
+
+
+def is_crawlable(url: str) -> bool:
+    """Whether a URL looks like an HTML page over HTTP(S)."""
+    parts = urlparse(url)
+    if parts.scheme not in ('http', 'https'):
+        return False
+    return posixpath.splitext(parts.path)[1].lower() not in SKIPPED_EXTENSIONS
+
+
+def is_sitemap(url: str) -> bool:
+    """Whether a seed URL points at a sitemap rather than a page."""
+    return urlparse(url).path.lower().endswith(('.xml', '.xml.gz'))
+
+
+class LinkParser(HTMLParser):
+    """Collects the absolute targets of <a>/<area> links, honouring <base href>."""
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.links: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'base':
+            href = dict(attrs).get('href')
+            if href:
+                self.base_url = urljoin(self.base_url, href.strip())
+        elif tag in ('a', 'area'):
+            attributes = dict(attrs)
+            href = attributes.get('href')
+            if href and 'nofollow' not in (attributes.get('rel') or '').lower().split():
+                self.links.append(urljoin(self.base_url, href.strip()))
+
+
+def extract_links(body: bytes, encoding: str, base_url: str) -> List[str]:
+    """Return the links of an HTML page, resolved against its URL."""
+    parser = LinkParser(base_url)
+    parser.feed(body.decode(encoding or 'utf-8', errors='replace'))
+    parser.close()
+    return parser.links
+
+
+class HostScheduler:
+    """Per-host concurrency limit and minimum delay between request starts."""
+
+    def __init__(self, per_host_limit: int = 2, delay: float = 1.0):
+        self.per_host_limit = max(1, per_host_limit)
+        self.delay = delay
+        self.lock = threading.Lock()
+        # host -> [semaphore, earliest start time of the next request]
+        self.hosts: Dict[str, list] = {}
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        """Hold one of the host's request slots, waiting out the delay first."""
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            state = self.hosts.get(host)
+            if state is None:
+                state = self.hosts[host] = [threading.BoundedSemaphore(self.per_host_limit), 0.0]
+
+        with state[0]:
+            # Reserve a start time under the lock so waiting threads queue up
+            with self.lock:
+                start = max(time.monotonic(), state[1])
+                state[1] = start + self.delay
+            wait = start - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            yield
+
+
+class Crawler:
+    """Breadth-first, same-origin crawl that analyzes every page it visits."""
+
+    # Upper bound on sitemaps read from nested sitemap indexes
+    MAX_SITEMAPS = 50
+
+    def __init__(self, extractor: 'WebTextExtractor', max_pages: int = 50,
+                 max_depth: int = 2, max_workers: int = 4,
+                 per_host_limit: int = 2, delay: float = 1.0,
+                 boilerplate: Optional['BoilerplateTracker'] = None):
+        """
+        ``max_workers`` bounds concurrent fetches overall, ``per_host_limit``
+        and ``delay`` (seconds between request starts) per host. Links are
+        followed up to ``max_depth`` hops from the seeds; at most
+        ``max_pages`` pages are visited. With ``boilerplate``, blocks shared
+        across pages are moved from the pages into ``site_wide``.
+        """
+        self.extractor = extractor
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.max_workers = max(1, max_workers)
+        self.scheduler = HostScheduler(per_host_limit, delay)
+        self.boilerplate = boilerplate
+        self.site_wide: List[SiteWideBlock] = []
+
+    def log(self, message: str):
+        self.extractor.log(message)
+
+    def sitemap_urls(self, sitemap_url: str) -> List[str]:
+        """Page URLs listed in a sitemap, following sitemap indexes."""
+        pages = []
+        pending = [sitemap_url]
+        seen = set()
+        while pending and len(seen) < self.MAX_SITEMAPS:
+            url = pending.pop(0)
+            if url in seen:
+                continue
+            seen.add(url)
+            try:
+                with self.scheduler.slot(url):
+                    body, _, _ = self.extractor.fetch_document(url)
+                if body[:2] == b'\x1f\x8b':
+                    body = gzip.decompress(body)
+                root = ElementTree.fromstring(body)
+            except Exception as e:
+                self.log(f"Skipping sitemap {url}: {e}")
+                continue
+
+            # <sitemapindex> entries point at further sitemaps
+            target = pending if root.tag.endswith('sitemapindex') else pages
+            for element in root.iter():
+                if element.tag != 'loc' and not element.tag.endswith('}loc'):
+                    continue
+                loc = (element.text or '').strip()
+                if loc:
+                    target.append(urljoin(url, loc))
+        return pages
+
+    def visit(self, url: str, depth: int) -> Tuple[CrawlPage, str, List[str]]:
+        """Fetch and analyze one page; returns its result, final URL and outgoing links."""
+        try:
+            if self.boilerplate is None:
+                final_url, body, encoding, elements = self.extractor.fetch_and_analyze(
+                    url, self.scheduler.slot(url))
+            else:
+                # Blocks are needed to fingerprint, so cached analyses are not reused
+                if not self.extractor.validate_url(url):
+                    raise Exception("Invalid URL format")
+                with self.scheduler.slot(url), self.extractor.timed_stage('fetch'):
+                    final_url, body, encoding, _ = self.extractor.fetch_url(url)
+                elements = self.boilerplate.analyze(self.extractor, final_url, body, encoding)
+        except Exception as e:
+            return (url, depth, None, str(e)), url, []
+
+        links = []
+        if depth < self.max_depth:
+            try:
+                links = extract_links(body, encoding, final_url)
+            except Exception:
+                links = []
+        return (url, depth, elements, None), final_url, links
+
+    def crawl(self, seed: str) -> List[CrawlPage]:
+        """Crawl from a page URL or a sitemap URL and return every visited page."""
+        seed = canonical_url(seed)
+        allowed_origins = {origin(seed)}
+        seeds = self.sitemap_urls(seed) if is_sitemap(seed) else [seed]
+
+        seen = set()
+        scheduled = []
+        pages: List[CrawlPage] = []
+        final_urls: List[str] = []
+
+        def admit(urls: List[str]) -> List[str]:
+            """Canonicalize, filter and dedupe URLs, respecting the page limit."""
+            admitted = []
+            for url in urls:
+                url = canonical_url(url)
+                if (url in seen or origin(url) not in allowed_origins
+                        or not is_crawlable(url)
+                        or len(scheduled) >= self.max_pages):
+                    continue
+                seen.add(url)
+                scheduled.append(url)
+                admitted.append(url)
+            return admitted
+
+        level = admit(seeds)
+        depth = 0
+        # Loaded once up front rather than by the first concurrent visits
+        self.extractor.load_detector()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # One level at a time keeps results deterministic under the page limit
+            while level:
+                self.log(f"Crawling {len(level)} page(s) at depth {depth}...")
+                next_level = []
+                for page, final_url, links in executor.map(self.visit, level, [depth] * len(level)):
+                    pages.append(page)
+                    final_urls.append(final_url)
+                    url, _, _, error = page
+                    if error is not None:
+                        self.log(f"  FAILED {url}: {error}")
+                    final_url = canonical_url(final_url)
+                    if depth == 0:
+                        # A seed redirecting to another host (www., https) moves the site there
+                        allowed_origins.add(origin(final_url))
+                    # Redirect targets count as visited
+                    seen.add(final_url)
+                    next_level += admit(links)
+                level = next_level
+                depth += 1
+
+        if self.boilerplate is not None:
+            # Only now are page counts final; pages still hold fingerprinted blocks
+            elements, self.site_wide = self.boilerplate.split(
+                [(final_url, page[2]) for final_url, page in zip(final_urls, pages)])
+            pages = [(url, depth, page_elements, error)
+                     for (url, depth, _, error), page_elements in zip(pages, elements)]
+        return pages
+
+
+def aggregate_findings(pages: List[CrawlPage]) -> List[Tuple[str, str, str, List[str]]]:
+    """Merge non-Polish snippets across pages into (tag, language, text, urls),
+    in order of first appearance."""
+    findings: Dict[Tuple[str, str], list] = {}
+    for url, _, elements, _ in pages:
+        for tag, language, text in elements or ():
+            key = (language, ' '.join(text.split()))
+            entry = findings.get(key)
+            if entry is None:
+                findings[key] = [tag, language, text, [url]]
+            elif entry[3][-1] != url:
+                entry[3].append(url)
+    return [tuple(entry) for entry in findings.values()]
+
+
+def iter_crawl_report(seed: str, pages: List[CrawlPage],
+                      site_wide: Optional[List[SiteWideBlock]] = None,
+                      home_name: str = 'Polish') -> Iterator[str]:
+    """Yield an HTML report of a crawl: site-wide blocks, unique findings,
+    then every page visited. ``home_name`` names the filtered-out languages."""
+    findings = aggregate_findings(pages)
+    site_wide = site_wide or []
+    failed = sum(1 for page in pages if page[3] is not None)
+
+    yield f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Non-{home_name} Text Extraction Crawl Report</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 20px; background-color: #f5f5f5; }}
+        .container {{ max-width: 1200px; margin: 0 auto; background: white; padding: 20px; border-radius: 8px; }}
+        h1, h2 {{ color: #333; text-align: center; }}
+        .stats {{ background: #e8f4f8; padding: 15px; border-radius: 5px; text-align: center; }}
+        table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
+        th, td {{ border: 1px solid #ddd; padding: 12px; text-align: left; vertical-align: top; }}
+        th {{ background-color: #f2f2f2; }}
+        .text-content {{ max-width: 500px; word-wrap: break-word; }}
+        .lang-code {{ background: #e3f2fd; padding: 2px 6px; border-radius: 3px; font-family: monospace; }}
+        .ok {{ color: #2e7d32; }}
+        .error {{ color: #c62828; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>Non-{home_name} Text Extraction Crawl Report</h1>
+        <div class="stats">
+            <strong>{html.escape(seed)}</strong><br>
+            Crawled {len(pages)} page(s), {failed} failed;
+            {len(findings)} unique non-{home_name} snippet(s)
+            + {len(site_wide)} site-wide
+        </div>
+"""
+    if site_wide:
+        yield """        <h2>Site-wide</h2>
+        <table>
+            <thead>
+                <tr>
+                    <th style="width: 50px;">#</th>
+                    <th style="width: 100px;">HTML Tag</th>
+                    <th style="width: 80px;">Language</th>
+                    <th>Text Content</th>
+                    <th style="width: 60px;">Pages</th>
+                </tr>
+            </thead>
+            <tbody>
+"""
+        for i, (tag, language, text, count) in enumerate(site_wide, 1):
+            yield f"""                <tr>
+                    <td>{i}</td>
+                    <td><code>&lt;{html.escape(tag)}&gt;</code></td>
+                    <td><span class="lang-code">{html.escape(language)}</span></td>
+                    <td class="text-content">{html.escape(text)}</td>
+                    <td>{count}</td>
+                </tr>
+"""
+        yield """            </tbody>
+        </table>
+"""
+    yield """        <h2>Findings</h2>
+        <table>
+            <thead>
+                <tr>
+                    <th style="width: 50px;">#</th>
+                    <th style="width: 100px;">HTML Tag</th>
+                    <th style="width: 80px;">Language</th>
+                    <th>Text Content</th>
+                    <th>Pages</th>
+                </tr>
+            </thead>
+            <tbody>
+"""
+    for i, (tag, language, text, urls) in enumerate(findings, 1):
+        links = '<br>'.join(f'<a href="{html.escape(url)}">{html.escape(url)}</a>'
+                            for url in urls[:3])
+        if len(urls) > 3:
+            links += f'<br>and {len(urls) - 3} more'
+        yield f"""                <tr>
+                    <td>{i}</td>
+                    <td><code>&lt;{html.escape(tag)}&gt;</code></td>
+                    <td><span class="lang-code">{html.escape(language)}</span></td>
+                    <td class="text-content">{html.escape(text)}</td>
+                    <td class="text-content">{links}</td>
+                </tr>
+"""
+    yield """            </tbody>
+        </table>
+        <h2>Pages</h2>
+        <table>
+            <thead>
+                <tr>
+                    <th style="width: 50px;">#</th>
+                    <th>URL</th>
+                    <th style="width: 60px;">Depth</th>
+                    <th>Result</th>
+                </tr>
+            </thead>
+            <tbody>
+"""
+    for i, (url, depth, elements, error) in enumerate(pages, 1):
+        if error is None:
+            status = f'<span class="ok">{len(elements)} non-{home_name} snippet(s)</span>'
+        else:
+            status = f'<span class="error">Error: {html.escape(error)}</span>'
+        yield f"""                <tr>
+                    <td>{i}</td>
+                    <td class="text-content"><a href="{html.escape(url)}">{html.escape(url)}</a></td>
+                    <td>{depth}</td>
+                    <td>{status}</td>
+                </tr>
+"""
+    yield """            </tbody>
+        </table>
+    </div>
+</body>
+</html>
+"""
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP Response Cache
+
+Stores fetched page bodies on disk together with their ETag/Last-Modified
+validators so revisits can be revalidated with a conditional request. The
+analysis result for a body can be stored alongside it, so a page that
+answers 304 Not Modified needs neither downloading nor re-analysis.
+
+Each URL is kept as two files named after the SHA-256 of the URL:
+``<key>.json`` (metadata and cached result) and ``<key>.body`` (raw bytes).
+Total size is capped; least recently used entries are evicted first.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class HttpCache:
+    """Size-capped on-disk cache of page bodies and their analyses."""
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # key -> [size in bytes, last used timestamp]
+        self.index: Dict[str, List[float]] = {}
+        os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            self._load_index()
+            self._evict()
+
+    @staticmethod
+    def key(url: str) -> str:
+        """Cache key for a URL."""
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def _load_index(self):
+        """Rebuild the size/recency index from the files on disk."""
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            key = name[:-5]
+            try:
+                meta_stat = os.stat(self._path(key, '.json'))
+                body_size = os.path.getsize(self._path(key, '.body'))
+            except OSError:
+                self._remove_files(key)
+                continue
+            self.index[key] = [meta_stat.st_size + body_size, meta_stat.st_mtime]
+
+    def _read_meta(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key, '.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_file(self, path: str, data: bytes):
+        """Write a file atomically."""
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def _remove_files(self, key: str):
+        for suffix in ('.json', '.body'):
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def _touch(self, key: str):
+        """Mark an entry as recently used. Caller holds the lock."""
+        now = time.time()
+        self.index[key][1] = now
+        try:
+            os.utime(self._path(key, '.json'), (now, now))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Drop least recently used entries until under the size cap."""
+        total = sum(size for size, _ in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k][1]):
+            if total <= self.max_bytes:
+                break
+            total -= self.index.pop(key)[0]
+            self._remove_files(key)
+
+    def _save(self, key: str, meta: dict, body: Optional[bytes] = None):
+        """Persist metadata (and optionally a new body). Caller holds the lock."""
+        meta_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        if body is not None:
+            self._write_file(self._path(key, '.body'), body)
+            body_size = len(body)
+        else:
+            body_size = meta['size']
+        self._write_file(self._path(key, '.json'), meta_bytes)
+        self.index[key] = [len(meta_bytes) + body_size, time.time()]
+        self._evict()
+
+    def validators(self, url: str) -> dict:
+        """Conditional request headers for a cached URL, if any."""
+        with self.lock:
+            key = self.key(url)
+            if key not in self.index:
+                return {}
+            meta = self._read_meta(key)
+        if meta is None:
+            return {}
+
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def get(self, url: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """Return the cached (body, encoding) for a URL."""
+        with self.lock:
+            key = self.key(url)
+            if key not in self.index:
+                return None
+            meta = self._read_meta(key)
+            try:
+                with open(self._path(key, '.body'), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                body = None
+            if meta is None or body is None:
+                self.index.pop(key, None)
+                self._remove_files(key)
+                return None
+            self._touch(key)
+            return body, meta.get('encoding')
+
+    def store(self, url: str, body: bytes, encoding: Optional[str],
+              etag: Optional[str], last_modified: Optional[str]):
+        """Cache a freshly downloaded body, discarding any stale analysis."""
+        if not etag and not last_modified:
+            # Nothing to revalidate against next time
+            self.discard(url)
+            return
+        if len(body) > self.max_bytes:
+            return
+
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': encoding,
+            'size': len(body),
+            'stored': time.time(),
+            'results': {},
+        }
+        with self.lock:
+            self._save(self.key(url), meta, body)
+
+    def get_result(self, url: str, result_key: str) -> Optional[List[Tuple[str, str, str]]]:
+        """Return the analysis stored for the cached body of a URL."""
+        with self.lock:
+            key = self.key(url)
+            if key not in self.index:
+                return None
+            meta = self._read_meta(key)
+        if meta is None or result_key not in meta.get('results', {}):
+            return None
+        return [tuple(element) for element in meta['results'][result_key]]
+
+    def store_result(self, url: str, result_key: str,
+                     elements: List[Tuple[str, str, str]]):
+        """Attach an analysis result to the cached body of a URL."""
+        with self.lock:
+            key = self.key(url)
+            if key not in self.index:
+                return
+            meta = self._read_meta(key)
+            if meta is None:
+                return
+            meta.setdefault('results', {})[result_key] = [list(element) for element in elements]
+            self._save(key, meta)
+
+    def discard(self, url: str):
+        """Remove a URL from the cache."""
+        with self.lock:
+            key = self.key(url)
+            self.index.pop(key, None)
+            self._remove_files(key)
+
+    def stats(self) -> dict:
+        """Return entry count and total size."""
+        with self.lock:
+            return {
+                'entries': len(self.index),
+                'bytes': int(sum(size for size, _ in self.index.values())),
+                'max_bytes': self.max_bytes,
+            }
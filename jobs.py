@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Background Job Queue for the Web Interface
+
+Runs analyses on a bounded thread pool so HTTP requests only submit work
+and poll for its status instead of waiting for the whole pipeline.
+
+Jobs run in the process that accepted them. With a JobStateFiles
+directory shared by several worker processes, every state change is also
+written there, so any worker can report on or cancel any job.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from admission import AdmissionController
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when it has been cancelled."""
+
+
+class QueueFull(Exception):
+    """Raised when too many jobs are already waiting to run."""
+
+
+class JobStateFiles:
+    """Job states as JSON files in a directory shared by worker processes,
+    with a marker file for each cancellation request."""
+
+    ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id: str, suffix: str = '.json') -> str:
+        return os.path.join(self.directory, job_id + suffix)
+
+    def save(self, job: 'Job'):
+        """Write a job's current state, replacing the previous one atomically."""
+        data = dict(job.to_dict(), finished=job.finished)
+        temp_path = f"{self._path(job.id)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self._path(job.id))
+        except OSError:
+            pass
+
+    def load(self, job_id: str) -> Optional[dict]:
+        """Return the last written state of a job, or None."""
+        if not self.ID_RE.match(job_id):
+            return None
+        try:
+            with open(self._path(job_id), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def request_cancel(self, job_id: str):
+        """Ask the process running a job to cancel it."""
+        try:
+            open(self._path(job_id, '.cancel'), 'w').close()
+        except OSError:
+            pass
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return os.path.exists(self._path(job_id, '.cancel'))
+
+    def remove(self, job_id: str):
+        """Forget a job's state and cancellation request."""
+        for suffix in ('.json', '.cancel'):
+            try:
+                os.remove(self._path(job_id, suffix))
+            except OSError:
+                pass
+
+    def prune(self, cutoff: float):
+        """Remove finished jobs of any process that finished before ``cutoff``."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            job_id = name[:-5]
+            if not name.endswith('.json') or not self.ID_RE.match(job_id):
+                continue
+            data = self.load(job_id)
+            if data is not None and data.get('finished') and data['finished'] < cutoff:
+                self.remove(job_id)
+
+
+class Job:
+    """State of a single analysis job."""
+
+    # Rough completion percentage when each extractor stage starts
+    STAGE_PROGRESS = {
+        'queued': 0,
+        'fetch': 10,
+        'parse': 30,
+        'extract': 45,
+        'classify': 60,
+        'render': 90,
+    }
+
+    # Fields of to_dict() that are not part of the result
+    FIELDS = ('job_id', 'url', 'status', 'stage', 'message', 'progress', 'error', 'finished')
+
+    def __init__(self, url: str, state: Optional[JobStateFiles] = None):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.status = 'queued'
+        self.stage = 'queued'
+        self.message = 'Waiting for a free worker...'
+        self.progress = 0
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.future = None
+        self.cancel_requested = threading.Event()
+        self.state = state
+
+    @classmethod
+    def from_state(cls, data: dict) -> 'Job':
+        """Rebuild a job of another process from its saved state, for reporting."""
+        job = cls(data['url'])
+        job.id = data['job_id']
+        job.status = data['status']
+        job.stage = data['stage']
+        job.message = data['message']
+        job.progress = data['progress']
+        job.error = data.get('error')
+        job.finished = data.get('finished')
+        job.result = {key: value for key, value in data.items() if key not in cls.FIELDS} or None
+        return job
+
+    def cancelled(self) -> bool:
+        """Whether cancellation was requested, here or by another process."""
+        if not self.cancel_requested.is_set() and self.state is not None \
+                and self.state.cancel_requested(self.id):
+            self.cancel_requested.set()
+        return self.cancel_requested.is_set()
+
+    def save(self):
+        """Share the job's state with other processes, if configured."""
+        if self.state is not None:
+            self.state.save(self)
+
+    @property
+    def done(self) -> bool:
+        """Whether the job has reached a final state."""
+        return self.status in ('done', 'failed', 'cancelled')
+
+    def update(self, stage: str, message: str):
+        """Record the stage a running job has reached."""
+        if self.cancelled():
+            raise JobCancelled()
+        self.stage = stage
+        self.message = message
+        self.progress = self.STAGE_PROGRESS.get(stage, self.progress)
+        self.save()
+
+    def to_dict(self) -> dict:
+        """Serialize the job for the status endpoint."""
+        data = {
+            'job_id': self.id,
+            'url': self.url,
+            'status': self.status,
+            'stage': self.stage,
+            'message': self.message,
+            'progress': self.progress,
+        }
+        if self.result is not None:
+            data.update(self.result)
+        if self.error is not None:
+            data['error'] = self.error
+        return data
+
+
+class JobQueue:
+    """Bounded background executor for analysis jobs."""
+
+    def __init__(self, run: Callable[[Job], dict], max_workers: int = 4,
+                 max_queued: int = 20, job_ttl: int = 3600,
+                 admission: Optional['AdmissionController'] = None,
+                 state_dir: Optional[str] = None):
+        """
+        ``run`` performs the analysis for a job, calling ``job.update`` as it
+        progresses, and returns extra fields for the job's status. With an
+        ``admission`` controller, jobs also hold one of its slots while they
+        run, sharing the in-flight cap with other kinds of analyses.
+
+        A ``state_dir`` shared by several processes lets each of them look
+        up and cancel the jobs of the others. Queue limits stay per process.
+        """
+        self.run = run
+        self.state = JobStateFiles(state_dir) if state_dir else None
+        self._state_pruned = 0.0
+        self.admission = admission
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.job_ttl = job_ttl
+        self.jobs: Dict[str, Job] = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='analysis')
+
+    def queued(self) -> int:
+        """Number of jobs waiting for a worker."""
+        with self.lock:
+            return sum(1 for job in self.jobs.values() if job.status == 'queued')
+
+    def status_counts(self) -> Dict[str, int]:
+        """Number of known jobs in each status."""
+        with self.lock:
+            counts: Dict[str, int] = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+    
+    def submit(self, url: str) -> Job:
+        """Queue an analysis, raising QueueFull if the queue is at capacity."""
+        with self.lock:
+            self._prune()
+            waiting = sum(1 for job in self.jobs.values() if job.status == 'queued')
+            if waiting >= self.max_queued:
+                raise QueueFull("Too many analyses are waiting, please try again shortly")
+
+            job = Job(url, self.state)
+            self.jobs[job.id] = job
+            job.save()
+            job.future = self.executor.submit(self._execute, job)
+            return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by ID, including jobs of other processes sharing the state directory."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None and self.state is not None:
+            data = self.state.load(job_id)
+            if data is not None:
+                job = Job.from_state(data)
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job. Running jobs stop at the next stage."""
+        with self.lock:
+            local = job_id in self.jobs
+        job = self.get(job_id)
+        if job is None or job.done:
+            return job
+        if not local:
+            # Another process runs it and picks the request up at its next stage
+            self.state.request_cancel(job_id)
+            job.message = 'Cancelling...'
+            return job
+
+        job.cancel_requested.set()
+        if job.future.cancel():
+            self._finish(job, 'cancelled', 'Analysis cancelled')
+        else:
+            job.message = 'Cancelling...'
+        return job
+
+    def shutdown(self):
+        """Stop accepting work and cancel everything still queued."""
+        for job in list(self.jobs.values()):
+            if job.status == 'queued':
+                self.cancel(job.id)
+        self.executor.shutdown(wait=False)
+
+    def _execute(self, job: Job):
+        """Run a job on a worker thread."""
+        if job.cancelled():
+            self._finish(job, 'cancelled', 'Analysis cancelled')
+            return
+
+        try:
+            with self.admission.slot(admitted=True) if self.admission else nullcontext():
+                if job.cancelled():
+                    raise JobCancelled()
+                job.status = 'running'
+                job.save()
+                job.result = self.run(job)
+            self._finish(job, 'done', 'Analysis completed successfully!')
+        except JobCancelled:
+            self._finish(job, 'cancelled', 'Analysis cancelled')
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, 'failed', 'Analysis failed')
+
+    def _finish(self, job: Job, status: str, message: str):
+        """Move a job to a final state."""
+        job.status = status
+        job.stage = status
+        job.message = message
+        if status == 'done':
+            job.progress = 100
+        job.finished = time.time()
+        job.save()
+
+    def _prune(self):
+        """Forget finished jobs older than the TTL. Caller holds the lock."""
+        cutoff = time.time() - self.job_ttl
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.done and job.finished < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
+            if self.state is not None:
+                self.state.remove(job_id)
+        # Jobs left behind by other (possibly exited) processes, once a minute
+        if self.state is not None and time.time() - self._state_pruned >= 60:
+            self._state_pruned = time.time()
+            self.state.prune(cutoff)
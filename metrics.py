@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Pipeline Metrics
+
+Process-wide counters and stage timings for WebTextExtractor: how long
+each pipeline stage takes, how many snippets were analyzed, and which
+detection strategy decided each language verdict. ``render_prometheus``
+formats them (plus any extra gauges) in the Prometheus text format for the
+web interface's /metrics route; the CLI prints a JSON summary instead.
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# (metric name, help text, type, [(labels, value), ...])
+MetricFamily = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+class PipelineMetrics:
+    """Thread-safe stage histograms and pipeline counters."""
+
+    # Upper bounds (seconds) of the stage duration histogram buckets
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero every counter."""
+        with self._lock:
+            # stage -> [count, sum, per-bucket counts]
+            self.stages: Dict[str, list] = {}
+            self.verdicts: Dict[str, int] = {}
+            self.pages: Dict[str, int] = {}
+            self.snippets = 0
+            self.non_polish = 0
+
+    def observe_stage(self, stage: str, seconds: float):
+        """Record the duration of one run of a stage."""
+        with self._lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                entry = self.stages[stage] = [0, 0.0, [0] * len(self.BUCKETS)]
+            entry[0] += 1
+            entry[1] += seconds
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    entry[2][i] += 1
+                    break
+
+    def count_verdict(self, strategy: str, count: int = 1):
+        """Record which strategy decided a freshly computed language verdict."""
+        with self._lock:
+            self.verdicts[strategy] = self.verdicts.get(strategy, 0) + count
+
+    def count_page(self, source: str, snippets: int = 0, non_polish: int = 0):
+        """Record a finished page ('analyzed' or 'cached') and its snippet counts."""
+        with self._lock:
+            self.pages[source] = self.pages.get(source, 0) + 1
+            self.snippets += snippets
+            self.non_polish += non_polish
+
+    def snapshot(self) -> dict:
+        """Return a copy of all counters."""
+        with self._lock:
+            return {
+                'stages': {stage: {'count': count, 'seconds': total, 'buckets': list(buckets)}
+                           for stage, (count, total, buckets) in self.stages.items()},
+                'verdicts': dict(self.verdicts),
+                'pages': dict(self.pages),
+                'snippets': self.snippets,
+                'non_polish': self.non_polish,
+            }
+
+    @staticmethod
+    def delta(before: dict, after: dict) -> dict:
+        """Summarize what happened between two snapshots (stage buckets omitted)."""
+        def counts(key):
+            return {name: value - before[key].get(name, 0)
+                    for name, value in after[key].items()
+                    if value != before[key].get(name, 0)}
+
+        stages = {}
+        for stage, values in after['stages'].items():
+            previous = before['stages'].get(stage, {'count': 0, 'seconds': 0.0})
+            if values['count'] != previous['count']:
+                stages[stage] = round(values['seconds'] - previous['seconds'], 6)
+        return {
+            'stages': stages,
+            'verdicts': counts('verdicts'),
+            'pages': counts('pages'),
+            'snippets': after['snippets'] - before['snippets'],
+            'non_polish': after['non_polish'] - before['non_polish'],
+        }
+
+
+# Metrics of everything this process has analyzed
+PIPELINE_METRICS = PipelineMetrics()
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in sorted(labels.items()):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(metrics: Optional[PipelineMetrics] = None,
+                      extra: Optional[List[MetricFamily]] = None) -> str:
+    """Format pipeline metrics and extra metric families as Prometheus text."""
+    snapshot = (metrics or PIPELINE_METRICS).snapshot()
+    lines = [
+        '# HELP pipeline_stage_seconds Duration of pipeline stages.',
+        '# TYPE pipeline_stage_seconds histogram',
+    ]
+    for stage, values in sorted(snapshot['stages'].items()):
+        cumulative = 0
+        for bound, count in zip(PipelineMetrics.BUCKETS, values['buckets']):
+            cumulative += count
+            lines.append(f'pipeline_stage_seconds_bucket'
+                         f'{_format_labels({"stage": stage, "le": _format_value(bound)})} {cumulative}')
+        lines.append(f'pipeline_stage_seconds_bucket{_format_labels({"stage": stage, "le": "+Inf"})} '
+                     f'{values["count"]}')
+        lines.append(f'pipeline_stage_seconds_sum{_format_labels({"stage": stage})} '
+                     f'{_format_value(values["seconds"])}')
+        lines.append(f'pipeline_stage_seconds_count{_format_labels({"stage": stage})} '
+                     f'{values["count"]}')
+
+    families: List[MetricFamily] = [
+        ('pipeline_pages_total', 'Pages finished, by whether they were analyzed or reused from the HTTP cache.',
+         'counter', [({'source': source}, count) for source, count in sorted(snapshot['pages'].items())]),
+        ('pipeline_snippets_total', 'Text snippets extracted from analyzed pages.',
+         'counter', [({}, snapshot['snippets'])]),
+        ('pipeline_non_polish_snippets_total', 'Snippets reported as non-Polish.',
+         'counter', [({}, snapshot['non_polish'])]),
+        ('language_verdicts_total', 'Computed language verdicts, by the strategy that decided them.',
+         'counter', [({'strategy': strategy}, count)
+                     for strategy, count in sorted(snapshot['verdicts'].items())]),
+    ]
+    for name, help_text, metric_type, samples in families + (extra or []):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in samples:
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
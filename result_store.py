@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Managed Result Store for the Web Interface
+
+Keeps analysis results for download under content-addressed keys, so
+identical analyses share one entry. Entries expire after a TTL, the total
+size on disk is capped (oldest entries are evicted first), and a background
+sweeper removes expired entries. Small results are also kept in memory and
+served without touching the disk.
+
+Several worker processes can share one directory: each sweep rebuilds the
+index from the files on disk, so the size cap covers every process's
+entries, and lookups check the file, so results stored or evicted by
+another process are seen right away.
+
+Results are stored as JSON lists of (tag, language, text) elements and
+rendered into a report when downloaded.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class ResultStore:
+    """Content-addressed, TTL- and size-bounded store of analysis results."""
+
+    KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+    def __init__(self, directory: Optional[str] = None, ttl: int = 24 * 3600,
+                 max_bytes: int = 512 * 1024 * 1024,
+                 memory_threshold: int = 64 * 1024, sweep_interval: int = 300):
+        """
+        Results up to ``memory_threshold`` bytes are also kept in memory
+        (0 disables this). The sweeper runs every ``sweep_interval`` seconds
+        once started.
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(),
+                                                   'non_polish_results')
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_threshold = memory_threshold
+        self.sweep_interval = sweep_interval
+        self.lock = threading.Lock()
+        # key -> [size in bytes, last stored timestamp]
+        self.index: Dict[str, List[float]] = {}
+        self.memory: Dict[str, bytes] = {}
+        self._stop = threading.Event()
+        self._sweeper = None
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock:
+            self._sweep()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.json')
+
+    def _load_index(self):
+        """Rebuild the index from the files on disk, left by a previous run
+        or written and removed by other processes. Caller holds the lock."""
+        index = {}
+        for name in os.listdir(self.directory):
+            key = name[:-5]
+            if not name.endswith('.json') or not self.KEY_RE.match(key):
+                continue
+            try:
+                stat = os.stat(self._path(key))
+            except OSError:
+                continue
+            index[key] = [stat.st_size, stat.st_mtime]
+        self.index = index
+        for key in [key for key in self.memory if key not in index]:
+            del self.memory[key]
+
+    def _refresh(self, key: str) -> Optional[List[float]]:
+        """Re-read one entry from disk. Caller holds the lock."""
+        try:
+            stat = os.stat(self._path(key))
+        except OSError:
+            self.index.pop(key, None)
+            self.memory.pop(key, None)
+            return None
+        entry = self.index[key] = [stat.st_size, stat.st_mtime]
+        return entry
+
+    def _remove(self, key: str):
+        """Drop an entry. Caller holds the lock."""
+        self.index.pop(key, None)
+        self.memory.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _sweep(self):
+        """Remove expired entries, then the oldest until under the size cap."""
+        self._load_index()
+        cutoff = time.time() - self.ttl
+        for key in [key for key, (_, stored) in self.index.items() if stored < cutoff]:
+            self._remove(key)
+
+        total = sum(size for size, _ in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k][1]):
+            if total <= self.max_bytes:
+                break
+            total -= self.index[key][0]
+            self._remove(key)
+
+    def put(self, elements: List[Tuple[str, str, str]]) -> str:
+        """Store a result and return its key. Identical results share a key."""
+        data = json.dumps([list(element) for element in elements],
+                          ensure_ascii=False).encode('utf-8')
+        key = hashlib.sha256(data).hexdigest()
+        now = time.time()
+
+        with self.lock:
+            if key in self.index and os.path.exists(self._path(key)):
+                # Already stored: just restart its TTL
+                self.index[key][1] = now
+                try:
+                    os.utime(self._path(key), (now, now))
+                except OSError:
+                    pass
+                return key
+
+            temp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, self._path(key))
+            self.index[key] = [len(data), now]
+            if len(data) <= self.memory_threshold:
+                self.memory[key] = data
+            self._sweep()
+        return key
+
+    def get(self, key: str) -> Optional[List[Tuple[str, str, str]]]:
+        """Return the stored elements for a key, or None if missing or expired."""
+        if not self.KEY_RE.match(key):
+            return None
+
+        with self.lock:
+            # The file decides, as other processes may have stored, renewed or evicted it
+            entry = self._refresh(key)
+            if entry is None:
+                return None
+            if entry[1] < time.time() - self.ttl:
+                self._remove(key)
+                return None
+            data = self.memory.get(key)
+            if data is None:
+                try:
+                    with open(self._path(key), 'rb') as f:
+                        data = f.read()
+                except OSError:
+                    self._remove(key)
+                    return None
+
+        return [tuple(element) for element in json.loads(data)]
+
+    def sweep(self):
+        """Run one expiry/eviction pass."""
+        with self.lock:
+            self._sweep()
+
+    def start_sweeper(self):
+        """Start the background thread that sweeps periodically.
+        
+        Also restarts it in a forked child, where the parent's thread is gone.
+        """
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        self._sweeper = threading.Thread(target=self._sweep_loop,
+                                         name='result-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def stop(self):
+        """Stop the background sweeper."""
+        self._stop.set()
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            self.sweep()
+
+    def stats(self) -> dict:
+        """Return entry counts and total size."""
+        with self.lock:
+            return {
+                'entries': len(self.index),
+                'in_memory': len(self.memory),
+                'bytes': int(sum(size for size, _ in self.index.values())),
+                'max_bytes': self.max_bytes,
+            }
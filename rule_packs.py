@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Home-Language Rule Packs
+
+The pattern rules that recognise the language an audited site is written
+in (its "home" language) come from rule packs: one JSON file per language
+in ``rule_packs/`` (``pl.json``, ``cs.json``, ``sk.json``) with
+
+- ``language``, ``name``: ISO 639-1 code and display name
+- ``common_words``: words that mark a snippet on their own
+- ``characters``: letters found only in the language
+- ``digraphs``: letter groups typical of the language, weaker evidence
+- ``endings``: word endings
+- ``possessives``: suffixes attached to foreign names ("iPhone'a")
+- ``phrases``: phrases the statistical identifier gets wrong
+- ``conjunction``, ``brand_terms``: "X <conjunction> Y" between brand names
+
+Packs are compiled into lookup tables (sets, endings grouped by length,
+regular expression sources) and marshalled together into
+``rule_packs/compiled.bin``, which loads in about a millisecond.
+``load_rule_packs`` rebuilds the artifact when a pack changes, the same
+way Python rebuilds stale .pyc files; ``python rule_packs.py`` builds it
+ahead of time, e.g. during deployment.
+
+Usage:
+    python rule_packs.py [--list]
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import marshal
+import argparse
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+PACK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rule_packs')
+ARTIFACT_PATH = os.path.join(PACK_DIR, 'compiled.bin')
+
+# Bumped whenever the layout of the compiled tables changes
+ARTIFACT_FORMAT = 3
+
+
+class CompiledLanguageRules:
+    """One language's rule tables compiled into fast lookup structures.
+
+    Evaluates the pattern strategies of ``WebTextExtractor.home_verdict``
+    (everything except the statistical fallback) over a single
+    tokenization of the snippet, in the order of the original Polish
+    rules. ``strategy`` names the rule that matched: 'characters',
+    'possessive', 'phrase', 'common_words', 'digraphs', 'endings',
+    'single_word' or 'brand_conjunction'.
+    """
+
+    # Punctuation stripped from both ends of every word
+    WORD_PUNCTUATION = '.,!?;:"()[]{}'
+
+    def __init__(self, tables: dict):
+        """Build the rules from ``compile_pack`` tables."""
+        self.language = tables['language']
+        self.name = tables['name']
+        # Identifies the pack content in cache keys
+        self.digest = tables['digest']
+        self.common_words = tables['common_words']
+        self.substring_re = (re.compile(tables['substring_pattern'])
+                             if tables['substring_pattern'] else None)
+        self.kind_res = tuple((kind, re.compile(pattern)) for kind, pattern in tables['kind_patterns'])
+        self.digraph_re = re.compile(tables['digraph_pattern']) if tables['digraph_pattern'] else None
+        self.endings_by_length = tables['endings_by_length']
+        self.ending_re = re.compile(tables['ending_pattern']) if tables['ending_pattern'] else None
+        self.conjunction = tables['conjunction']
+        self.brand_terms = tables['brand_terms']
+
+    @classmethod
+    def from_pack(cls, pack: dict) -> 'CompiledLanguageRules':
+        """Compile a rule pack as read from its JSON file."""
+        return cls(compile_pack(pack))
+
+    def has_ending(self, word: str) -> bool:
+        """Check whether a word ends with one of the language endings."""
+        for length, endings in self.endings_by_length:
+            if word[-length:] in endings:
+                return True
+        return False
+
+    def matches(self, text: str) -> bool:
+        """Return True if any pattern strategy identifies the text."""
+        return self.strategy(text) is not None
+
+    def strategy(self, text: str) -> Optional[str]:
+        """Return the name of the first pattern strategy identifying the text, or None."""
+        text_lower = text.lower().strip()
+
+        # Strategies 1, 2, 2.5 and 4 are substring checks; one combined
+        # search rules all of them out for most foreign text
+        has_substring = self.substring_re is not None and self.substring_re.search(text_lower)
+        if has_substring:
+            # Strategies 1, 2, 2.5: diacritics, possessives, phrases, in that order
+            for kind, pattern in self.kind_res:
+                if pattern.search(text_lower):
+                    return kind
+
+        words = text_lower.split()
+        if not words:
+            return None
+
+        # Strategies 3 and 5: common words and endings, counted together
+        punctuation = self.WORD_PUNCTUATION
+        common_words = self.common_words
+        word_count = 0
+        ending_count = 0
+        for word in words:
+            clean_word = word.strip(punctuation)
+            if clean_word in common_words:
+                word_count += 1
+            if self.has_ending(clean_word):
+                ending_count += 1
+
+        if len(words) <= 3 and word_count >= 1:
+            return 'common_words'
+        if word_count / len(words) > 0.1:
+            return 'common_words'
+
+        # Strategy 4: digraphs, weaker evidence than the common words
+        if has_substring and self.digraph_re is not None and self.digraph_re.search(text_lower):
+            return 'digraphs'
+
+        if ending_count / len(words) > 0.05:
+            return 'endings'
+
+        # Strategy 6: an ending anywhere inside a single-word snippet
+        if (len(words) == 1 and self.ending_re is not None
+                and self.ending_re.search(words[0].strip(punctuation))):
+            return 'single_word'
+
+        # Strategy 6.5: the conjunction between brand names ("iPhone i Mac")
+        conjunction = self.conjunction
+        if self.brand_terms and f' {conjunction} ' in text_lower and len(words) >= 3:
+            for i in range(1, len(words) - 1):
+                if words[i] != conjunction:
+                    continue
+                for neighbour in (words[i - 1], words[i + 1]):
+                    if any(term in neighbour for term in self.brand_terms):
+                        return 'brand_conjunction'
+
+        return None
+
+
+def alternation(patterns: Iterable[str]) -> str:
+    """Regular expression matching any of the literal patterns, longest first."""
+    return '|'.join(re.escape(pattern) for pattern in sorted(set(patterns), key=len, reverse=True))
+
+
+def compile_pack(pack: dict) -> dict:
+    """Turn a rule pack into the tables CompiledLanguageRules works on.
+
+    Only marshallable types are used (strings, tuples, frozensets, dicts),
+    so the result can be stored in the artifact as is.
+    """
+    # Strategies 1, 2, 2.5 and 4 are plain substring checks on the
+    # lowercased text. One alternation of all of them is the quick test;
+    # only text that passes it is searched kind by kind, in strategy order.
+    kind_patterns = tuple((kind, alternation(pack[key]))
+                          for kind, key in (('characters', 'characters'),
+                                            ('possessive', 'possessives'),
+                                            ('phrase', 'phrases'))
+                          if pack.get(key))
+    digraphs = pack.get('digraphs', ())
+    substrings = [pattern for key in ('characters', 'possessives', 'phrases', 'digraphs')
+                  for pattern in pack.get(key, ())]
+
+    # Endings grouped by length: an endswith() check becomes one slice
+    # and one set lookup per distinct ending length
+    endings = pack.get('endings', ())
+    endings_by_length = {}
+    for ending in endings:
+        endings_by_length.setdefault(len(ending), set()).add(ending)
+
+    content = json.dumps(pack, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return {
+        'language': pack['language'],
+        'name': pack.get('name', pack['language']),
+        'digest': hashlib.sha256(content).hexdigest()[:12],
+        'common_words': frozenset(pack.get('common_words', ())),
+        'substring_pattern': alternation(substrings),
+        'substring_count': len(set(substrings)),
+        'kind_patterns': kind_patterns,
+        'digraph_pattern': alternation(digraphs),
+        'endings_by_length': tuple((length, frozenset(group))
+                                   for length, group in sorted(endings_by_length.items())),
+        'ending_pattern': alternation(endings),
+        'conjunction': pack.get('conjunction', ''),
+        'brand_terms': tuple(pack.get('brand_terms', ())),
+    }
+
+
+def pack_sources(directory: str = PACK_DIR) -> Dict[str, str]:
+    """Rule pack JSON files by language code."""
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return {}
+    return {name[:-5]: os.path.join(directory, name) for name in names if name.endswith('.json')}
+
+
+def source_stamps(sources: Dict[str, str]) -> Dict[str, Tuple[int, int]]:
+    """(modification time, size) of each pack file, to tell whether the artifact is stale."""
+    stamps = {}
+    for language, path in sources.items():
+        stat = os.stat(path)
+        stamps[language] = (stat.st_mtime_ns, stat.st_size)
+    return stamps
+
+
+def compile_sources(directory: str = PACK_DIR) -> Tuple[Dict[str, dict], Dict[str, Tuple[int, int]]]:
+    """Compile every pack in ``directory``; returns the tables by language
+    and the stamps of the pack files they came from."""
+    sources = pack_sources(directory)
+    packs = {}
+    for language, source in sources.items():
+        with open(source, encoding='utf-8') as f:
+            pack = json.load(f)
+        if pack.get('language') != language:
+            raise Exception(f"Rule pack {source} declares language "
+                            f"{pack.get('language')!r}, expected {language!r}")
+        packs[language] = compile_pack(pack)
+    return packs, source_stamps(sources)
+
+
+def write_artifact(packs: Dict[str, dict], stamps: Dict[str, Tuple[int, int]],
+                   path: str = ARTIFACT_PATH):
+    """Marshal compiled packs into the artifact, replacing it atomically."""
+    data = marshal.dumps({'format': ARTIFACT_FORMAT, 'sources': stamps, 'packs': packs})
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def build_artifact(directory: str = PACK_DIR, path: str = ARTIFACT_PATH) -> Dict[str, dict]:
+    """Compile the packs and refresh the artifact, returning the tables.
+
+    A read-only install keeps working without the artifact; it just
+    compiles the packs on every start.
+    """
+    packs, stamps = compile_sources(directory)
+    try:
+        write_artifact(packs, stamps, path)
+    except OSError:
+        pass
+    return packs
+
+
+def read_artifact(directory: str = PACK_DIR, path: str = ARTIFACT_PATH) -> Optional[Dict[str, dict]]:
+    """Compiled tables from the artifact, or None if it is missing, unreadable
+    or older than the pack files next to it."""
+    try:
+        with open(path, 'rb') as f:
+            artifact = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(artifact, dict) or artifact.get('format') != ARTIFACT_FORMAT:
+        return None
+    # Without pack sources (an artifact-only install) the artifact is all there is
+    sources = pack_sources(directory)
+    if sources and source_stamps(sources) != artifact['sources']:
+        return None
+    return artifact['packs']
+
+
+# Compiled packs of this process, shared by every extractor
+_packs: Optional[Dict[str, dict]] = None
+_rules: Dict[str, CompiledLanguageRules] = {}
+_lock = threading.Lock()
+
+
+def compiled_packs() -> Dict[str, dict]:
+    """Compiled tables of every available pack, read (or rebuilt) once per process."""
+    global _packs
+    with _lock:
+        if _packs is None:
+            packs = read_artifact()
+            _packs = packs if packs is not None else build_artifact()
+        return _packs
+
+
+def available_languages() -> Tuple[str, ...]:
+    """Language codes that have a rule pack."""
+    return tuple(sorted(compiled_packs()))
+
+
+def load_rule_packs(languages: Iterable[str]) -> Tuple[CompiledLanguageRules, ...]:
+    """Rules for the given languages, in order; unknown languages raise."""
+    packs = compiled_packs()
+    rules = []
+    for language in languages:
+        if language not in packs:
+            raise Exception(f"No rule pack for language {language!r} "
+                            f"(available: {', '.join(sorted(packs))})")
+        with _lock:
+            if language not in _rules:
+                _rules[language] = CompiledLanguageRules(packs[language])
+            rules.append(_rules[language])
+    return tuple(rules)
+
+
+def parse_languages(value: str) -> Tuple[str, ...]:
+    """Parse a comma-separated list of language codes, dropping repeats."""
+    languages = []
+    for language in value.split(','):
+        language = language.strip().lower()
+        if language and language not in languages:
+            languages.append(language)
+    return tuple(languages)
+
+
+def main():
+    """Compile the rule packs into the artifact."""
+    parser = argparse.ArgumentParser(description="Compile home-language rule packs.")
+    parser.add_argument('--list', action='store_true', help="list the packs instead of compiling")
+    args = parser.parse_args()
+
+    if args.list:
+        packs = compiled_packs()
+    else:
+        packs, stamps = compile_sources()
+        try:
+            write_artifact(packs, stamps)
+        except OSError as e:
+            sys.exit(f"Could not write {ARTIFACT_PATH}: {e}")
+    for language, tables in sorted(packs.items()):
+        print(f"{language}: {tables['name']} ({len(tables['common_words'])} words, "
+              f"{tables['substring_count']} patterns, "
+              f"{sum(len(group) for _, group in tables['endings_by_length'])} endings)")
+    if not args.list:
+        print(f"Compiled {len(packs)} pack(s) into {ARTIFACT_PATH}")
+
+if __name__ == '__main__':
+    main()
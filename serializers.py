@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Machine-Readable Result Formats
+
+Serializers for the non-Polish (tag, language, text) elements produced by
+WebTextExtractor, next to its HTML report: a JSON document, NDJSON (one
+object per snippet, so consumers can process results as they arrive) and
+CSV. Every serializer yields text chunks and accepts any iterable, so
+results can be streamed while they are still being classified.
+"""
+
+import csv
+import io
+import json
+from typing import Iterable, Iterator, Optional, Tuple
+
+# format -> (MIME type, file extension)
+FORMATS = {
+    'html': ('text/html', 'html'),
+    'json': ('application/json', 'json'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+}
+
+CSV_COLUMNS = ('index', 'tag', 'language', 'text')
+
+
+def element_record(index: int, element: Tuple[str, str, str]) -> dict:
+    """The JSON object for one numbered (tag, language, text) element."""
+    tag, language, text = element
+    return {'index': index, 'tag': tag, 'language': language, 'text': text}
+
+
+def iter_ndjson(elements: Iterable[Tuple[str, str, str]]) -> Iterator[str]:
+    """Yield one JSON line per element."""
+    for index, element in enumerate(elements, 1):
+        yield json.dumps(element_record(index, element), ensure_ascii=False) + '\n'
+
+
+def iter_json(elements: Iterable[Tuple[str, str, str]],
+              url: Optional[str] = None) -> Iterator[str]:
+    """Yield a JSON document {"url", "results", "count"} piece by piece."""
+    yield '{"url": ' + json.dumps(url) + ', "results": ['
+    count = 0
+    for count, element in enumerate(elements, 1):
+        prefix = '\n  ' if count == 1 else ',\n  '
+        yield prefix + json.dumps(element_record(count, element), ensure_ascii=False)
+    yield ('\n' if count else '') + '], "count": ' + str(count) + '}\n'
+
+
+def iter_csv(elements: Iterable[Tuple[str, str, str]]) -> Iterator[str]:
+    """Yield a CSV header row, then one row per element."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+
+    def row(values) -> str:
+        writer.writerow(values)
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    yield row(CSV_COLUMNS)
+    for index, (tag, language, text) in enumerate(elements, 1):
+        yield row((index, tag, language, text))
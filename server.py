@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Production Server for the Web Interface
+
+Runs app.py under gunicorn with prefork worker processes, each serving
+requests on a pool of threads (the gthread worker). Worker and thread
+counts come from the command line or WEB_WORKERS/WEB_THREADS.
+
+The app is preloaded and warmed up in the master process before forking:
+language profiles, parser modules and the shared extractor are loaded
+once, then frozen out of the garbage collector's reach (gc.freeze) so
+workers share those pages copy-on-write and serve their first request at
+steady-state latency.
+
+Each worker process has its own admission limits, caches and job queue,
+so state the workers must agree on lives on disk:
+
+- analysis jobs run in the worker that accepted them, but with more than
+  one worker their state is also written to ANALYSIS_JOBS_DIR (a
+  directory under the system temp dir unless set), so ``/jobs/<id>``
+  polls and cancellations work on any worker
+- results for ``/download/<key>`` are files in RESULTS_DIR; a worker that
+  did not store a result finds it there on first request, and every
+  worker's sweep counts all files against the RESULTS_MAX_BYTES cap
+
+Both directories must be shared by all workers, which they are on one
+machine by default.
+
+Without gunicorn installed (``pip install gunicorn``), falls back to
+Werkzeug's threaded server in a single process.
+
+Usage:
+    python server.py [--bind HOST:PORT] [--workers N] [--threads N] [--timeout S]
+                     [--no-preload]
+"""
+
+import gc
+import os
+import argparse
+import tempfile
+import importlib.util
+from typing import List, Optional
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Serve the web interface in production.")
+    parser.add_argument('--bind', default=os.environ.get('WEB_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}"),
+                        help="address to listen on (default: WEB_BIND or 0.0.0.0:$PORT, port 5000)")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_WORKERS', 1)),
+                        help="worker processes (default: WEB_WORKERS or 1)")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', 16)),
+                        help="request threads per worker (default: WEB_THREADS or 16)")
+    parser.add_argument('--timeout', type=int, default=int(os.environ.get('WEB_TIMEOUT', 120)),
+                        help="seconds before a silent worker is restarted (default: WEB_TIMEOUT or 120)")
+    parser.add_argument('--no-preload', dest='preload', action='store_false',
+                        default=os.environ.get('WEB_PRELOAD', '1') != '0',
+                        help="load and warm up the app in each worker instead of before forking "
+                             "(or WEB_PRELOAD=0)")
+    return parser.parse_args(argv)
+
+
+def load_app(warm: bool = True):
+    """Import the app and, with ``warm``, warm it up and freeze the
+    resulting objects so forked workers do not copy them."""
+    import app
+    if warm:
+        seconds = app.warm_up()
+        print(f"Warmed up in {seconds * 1000:.0f} ms")
+        # Objects that survive this far live as long as the process; keeping
+        # the collector from touching them keeps their pages shared
+        gc.collect()
+        gc.freeze()
+    return app
+
+
+def post_fork(server, worker):
+    """gunicorn hook: restart per-process background threads in a new worker."""
+    import app
+    app.after_fork()
+
+
+def run_gunicorn(args: argparse.Namespace):
+    """Serve the app with gunicorn's prefork gthread workers."""
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', args.bind)
+            self.cfg.set('workers', max(1, args.workers))
+            self.cfg.set('threads', max(1, args.threads))
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', args.timeout)
+            self.cfg.set('graceful_timeout', args.timeout)
+            # With preload, load() runs once in the master before forking
+            self.cfg.set('preload_app', args.preload)
+            self.cfg.set('post_fork', post_fork)
+
+        def load(self):
+            return load_app().app
+
+    Application().run()
+
+
+def run_werkzeug(args: argparse.Namespace):
+    """Serve the app with Werkzeug's threaded server (single process)."""
+    from werkzeug.serving import run_simple
+    app = load_app(warm=args.preload).app
+    host, _, port = args.bind.rpartition(':')
+    run_simple(host or '0.0.0.0', int(port), app, threaded=True)
+
+
+def main():
+    """Main function."""
+    args = parse_args()
+    if args.workers > 1:
+        # Workers share job state through files; set before the app is imported
+        os.environ.setdefault('ANALYSIS_JOBS_DIR',
+                              os.path.join(tempfile.gettempdir(), 'non_polish_jobs'))
+    if importlib.util.find_spec('gunicorn') is None:
+        print("Warning: gunicorn is not installed (pip install gunicorn), "
+              "serving with Werkzeug's threaded server in one process")
+        run_werkzeug(args)
+        return
+    run_gunicorn(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Snapshots for Incremental Re-Analysis
+
+Monitored pages change little between scans. A SnapshotStore keeps, per
+URL, the fingerprint (tag path plus normalized text, see boilerplate.py)
+and language verdict of every text block from the last scan. The next
+scan only classifies blocks whose fingerprint is new, then reports which
+non-Polish snippets appeared and which were resolved since the snapshot.
+
+Each URL is one ``<sha256 of url>.json`` file, replaced atomically.
+"""
+
+import os
+import html
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+
+from boilerplate import BoilerplateTracker
+from metrics import PIPELINE_METRICS
+
+if TYPE_CHECKING:
+    from web_scraper import WebTextExtractor
+
+Element = Tuple[str, str, str]
+
+# (all non-Polish elements, newly appeared, resolved, time of the previous scan or None)
+SnapshotResult = Tuple[List[Element], List[Element], List[Element], Optional[float]]
+
+
+class SnapshotStore:
+    """Per-URL block fingerprints and verdicts from the previous scan."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory,
+                            hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def load(self, url: str) -> Optional[dict]:
+        """Return the stored snapshot of a URL, if any."""
+        try:
+            with open(self._path(url), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, url: str, snapshot: dict):
+        """Replace the snapshot of a URL atomically."""
+        path = self._path(url)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def analyze(self, extractor: 'WebTextExtractor', url: str) -> SnapshotResult:
+        """Fetch and analyze a URL, reusing verdicts of unchanged blocks.
+
+        Verdicts are only reused from a snapshot taken with the same
+        analysis settings; the diff is reported either way.
+        """
+        if not extractor.validate_url(url):
+            raise Exception("Invalid URL format")
+        with extractor.timed_stage('fetch'):
+            body, encoding, _ = extractor.fetch_document(url)
+        blocks = extractor.extract_blocks(body, encoding)
+        fingerprints = [BoilerplateTracker.fingerprint(path, text) for path, _, text in blocks]
+
+        previous = self.load(url)
+        verdicts = {}
+        if previous is not None and previous.get('analysis_key') == extractor.analysis_key():
+            verdicts = {fp: previous['blocks'][fp] for fp in fingerprints
+                        if fp in previous['blocks']}
+
+        changed = {}
+        for fp, (_, _, text) in zip(fingerprints, blocks):
+            if fp not in verdicts:
+                changed.setdefault(fp, text)
+        extractor.log(f"{len(changed)} of {len(set(fingerprints))} block(s) new or changed "
+                      f"since the last snapshot")
+        with extractor.timed_stage('classify'):
+            languages = extractor.classify_texts(list(changed.values()))
+        if verdicts:
+            PIPELINE_METRICS.count_verdict('snapshot', len(verdicts))
+        verdicts.update(zip(changed, languages))
+
+        elements = []
+        non_polish = {}
+        for fp, (_, tag, text) in zip(fingerprints, blocks):
+            language = verdicts[fp]
+            if language is None or language in extractor.home_language_set:
+                continue
+            elements.append((tag, language, text))
+            non_polish.setdefault(fp, (tag, language, text))
+        PIPELINE_METRICS.count_page('analyzed', len(blocks), len(elements))
+
+        previous_scan = None
+        appeared = list(non_polish.values())
+        resolved = []
+        if previous is not None:
+            previous_scan = previous.get('scanned')
+            before = {fp: tuple(element) for fp, *element in previous['non_polish']}
+            appeared = [element for fp, element in non_polish.items() if fp not in before]
+            resolved = [element for fp, element in before.items() if fp not in non_polish]
+
+        self.save(url, {
+            'url': url,
+            'analysis_key': extractor.analysis_key(),
+            'scanned': time.time(),
+            'blocks': verdicts,
+            'non_polish': [[fp, *element] for fp, element in non_polish.items()],
+        })
+        return elements, appeared, resolved, previous_scan
+
+
+def iter_changes_json(url: str, appeared: List[Element], resolved: List[Element],
+                      previous_scan: Optional[float]) -> Iterator[str]:
+    """Yield the changes since the previous scan as a JSON document."""
+    def records(elements):
+        return [{'tag': tag, 'language': language, 'text': text}
+                for tag, language, text in elements]
+
+    yield json.dumps({
+        'url': url,
+        'previous_scan': previous_scan,
+        'appeared': records(appeared),
+        'resolved': records(resolved),
+    }, ensure_ascii=False, indent=2) + '\n'
+
+
+def iter_changes_report(url: str, appeared: List[Element], resolved: List[Element],
+                        previous_scan: Optional[float], home_name: str = 'Polish') -> Iterator[str]:
+    """Yield an HTML report of the non-``home_name`` snippets that appeared
+    or were resolved since the previous scan."""
+    if previous_scan is None:
+        since = 'No previous snapshot; every snippet is new'
+    else:
+        since = f"Changes since {datetime.fromtimestamp(previous_scan):%Y-%m-%d %H:%M:%S}"
+
+    yield f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Non-{home_name} Text Changes</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 20px; background-color: #f5f5f5; }}
+        .container {{ max-width: 1200px; margin: 0 auto; background: white; padding: 20px; border-radius: 8px; }}
+        h1, h2 {{ color: #333; text-align: center; }}
+        .stats {{ background: #e8f4f8; padding: 15px; border-radius: 5px; text-align: center; }}
+        table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
+        th, td {{ border: 1px solid #ddd; padding: 12px; text-align: left; vertical-align: top; }}
+        th {{ background-color: #f2f2f2; }}
+        .text-content {{ max-width: 500px; word-wrap: break-word; }}
+        .lang-code {{ background: #e3f2fd; padding: 2px 6px; border-radius: 3px; font-family: monospace; }}
+        .no-content {{ text-align: center; color: #666; padding: 20px; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>Non-{home_name} Text Changes</h1>
+        <div class="stats">
+            <strong>{html.escape(url)}</strong><br>
+            {since}:
+            {len(appeared)} appeared, {len(resolved)} resolved
+        </div>
+"""
+    for title, elements in (('Newly Appeared', appeared), ('Resolved', resolved)):
+        yield f"""        <h2>{title}</h2>
+"""
+        if not elements:
+            yield """        <div class="no-content">None</div>
+"""
+            continue
+        yield """        <table>
+            <thead>
+                <tr>
+                    <th style="width: 50px;">#</th>
+                    <th style="width: 100px;">HTML Tag</th>
+                    <th style="width: 80px;">Language</th>
+                    <th>Text Content</th>
+                </tr>
+            </thead>
+            <tbody>
+"""
+        for i, (tag, language, text) in enumerate(elements, 1):
+            yield f"""                <tr>
+                    <td>{i}</td>
+                    <td><code>&lt;{html.escape(tag)}&gt;</code></td>
+                    <td><span class="lang-code">{html.escape(language)}</span></td>
+                    <td class="text-content">{html.escape(text)}</td>
+                </tr>
+"""
+        yield """            </tbody>
+        </table>
+"""
+    yield """    </div>
+</body>
+</html>
+"""
@@ -0,0 +1,104 @@
+"""
+Crawl tests against a local static-file server.
+
+Each test serves a small site from a temporary directory and crawls it
+with several workers, starting with the language detector unloaded as in
+a fresh process, so races while loading it show up as missing findings.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from langdetect import detector_factory
+
+import web_scraper
+from boilerplate import BoilerplateTracker
+from crawler import Crawler, aggregate_findings
+from web_scraper import LANGDETECT_CACHE, LANGUAGE_CACHE, WebTextExtractor
+
+FOOTER = '<footer>All rights reserved worldwide forever</footer>'
+
+PAGES = {
+    'index.html': f'''<html><body>
+        <h1>Witamy w naszym sklepie internetowym</h1>
+        <p>Najnowsze produkty dla całej rodziny</p>
+        <p>This page is written in English for visitors</p>
+        <a href="a.html">Blog</a> <a href="/b.html#top">Kontakt</a> <a href="a.html?">Blog</a>
+        {FOOTER}</body></html>''',
+    'a.html': f'''<html><body>
+        <h1>Nowości na naszym blogu</h1>
+        <p>Blog in English here</p>
+        <a href="index.html">Strona główna</a>
+        {FOOTER}</body></html>''',
+    'b.html': f'''<html><body>
+        <h1>Skontaktuj się z nami</h1>
+        <p>Zapraszamy do naszego sklepu</p>
+        {FOOTER}</body></html>''',
+}
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class CrawlerTest(unittest.TestCase):
+
+    def setUp(self):
+        detector_factory._factory = None
+        web_scraper._profiles_loaded = False
+        LANGUAGE_CACHE.clear()
+        LANGDETECT_CACHE.clear()
+        self.directory = tempfile.mkdtemp()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                          partial(QuietHandler, directory=self.directory))
+        self.base = f"http://127.0.0.1:{self.server.server_port}/"
+        for name, content in PAGES.items():
+            with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+        with open(os.path.join(self.directory, 'sitemap.xml'), 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>'
+                    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                    f'<url><loc>{self.base}index.html</loc></url>'
+                    f'<url><loc>{self.base}a.html</loc></url>'
+                    '</urlset>')
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.extractor = WebTextExtractor(verbose=False)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.extractor.close()
+        shutil.rmtree(self.directory)
+
+    def test_sitemap_crawl_with_boilerplate(self):
+        crawler = Crawler(self.extractor, delay=0, boilerplate=BoilerplateTracker(2))
+        pages = {url: elements for url, _, elements, error in crawler.crawl(self.base + 'sitemap.xml')}
+
+        self.assertIn(('p', 'en', 'Blog in English here'), pages[self.base + 'a.html'])
+        self.assertIn(('p', 'en', 'This page is written in English for visitors'),
+                      pages[self.base + 'index.html'])
+        self.assertEqual([(tag, language, text) for tag, language, text, _ in crawler.site_wide],
+                         [('footer', 'en', 'All rights reserved worldwide forever')])
+
+    def test_link_crawl_dedupes_and_filters_polish(self):
+        crawler = Crawler(self.extractor, delay=0)
+        pages = crawler.crawl(self.base + 'index.html')
+
+        self.assertEqual(sorted(url for url, _, _, _ in pages),
+                         [self.base + name for name in ('a.html', 'b.html', 'index.html')])
+        self.assertTrue(all(error is None for _, _, _, error in pages))
+        texts = {text for _, _, text, _ in aggregate_findings(pages)}
+        self.assertEqual(texts, {'This page is written in English for visitors',
+                                 'Blog in English here',
+                                 'All rights reserved worldwide forever'})
+
+
+if __name__ == '__main__':
+    unittest.main()
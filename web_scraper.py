@@ -10,33 +10,358 @@ Usage:
     python web_scraper.py <URL>
     or
     python web_scraper.py (will prompt for URL)
+    or
+    python web_scraper.py --batch urls.txt (one URL per line, '-' for stdin)
+    or
+    python web_scraper.py --crawl <URL or sitemap.xml URL>
+
+Reports are HTML by default; --format json, ndjson or csv writes
+machine-readable results instead.
 
 Dependencies:
     - requests
     - beautifulsoup4
     - langdetect
+
+Heavy libraries are imported when their feature is first used, so
+``--help`` and the Flask app start quickly. Run
+``benchmarks/bench_startup.py`` to check the import time budget.
 """
 
 import sys
+import os
 import re
 import html
+import json
+import time
+import codecs
+import argparse
+import importlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+from http_cache import HttpCache
+from metrics import PIPELINE_METRICS, PipelineMetrics
+from rule_packs import load_rule_packs, parse_languages
+from serializers import FORMATS, iter_csv, iter_json, iter_ndjson
+from html.parser import HTMLParser
 from urllib.parse import urlparse
-from typing import List, Tuple, Optional
+from typing import (TYPE_CHECKING, Callable, Iterable, Iterator, List,
+                    Optional, Sequence, TextIO, Tuple, Union)
 
-try:
+if TYPE_CHECKING:
     import requests
-    from bs4 import BeautifulSoup, Comment
-    from langdetect import detect, DetectorFactory, LangDetectException
-    from textblob import TextBlob
-    import os
-    from openai import OpenAI
-except ImportError as e:
-    print(f"Error: Missing required library. Please install: {e.name}")
-    print("Install with: pip install requests beautifulsoup4 langdetect textblob openai")
-    sys.exit(1)
-
-# Set seed for consistent language detection results
-DetectorFactory.seed = 0
+    from adjudicator import LLMAdjudicator, PageBudget
+    from rule_packs import CompiledLanguageRules
+    from bs4 import BeautifulSoup
+    from concurrent.futures import ProcessPoolExecutor
+
+# Called as progress(stage, message) when a processing stage starts
+ProgressCallback = Callable[[str, str], None]
+
+# (url, non-Polish elements or None, error message or None) from process_urls
+BatchResult = Tuple[str, Optional[List[Tuple[str, str, str]]], Optional[str]]
+
+
+_profiles_lock = threading.Lock()
+_profiles_loaded = False
+
+
+def load_language_profiles():
+    """Seed langdetect and load its language profiles once per process.
+    
+    langdetect's own init_factory publishes its factory before the profiles
+    are loaded, so a thread detecting at the same time could use a
+    half-loaded one. The factory is built here under a lock and published
+    only when complete; every detection goes through this function first.
+    """
+    global _profiles_loaded
+    if _profiles_loaded:
+        return
+    with _profiles_lock:
+        if _profiles_loaded:
+            return
+        from langdetect import DetectorFactory, detector_factory
+        # Set seed for consistent language detection results
+        DetectorFactory.seed = 0
+        if detector_factory._factory is None:
+            factory = DetectorFactory()
+            factory.load_profile(detector_factory.PROFILES_DIRECTORY)
+            detector_factory._factory = factory
+        _profiles_loaded = True
+
+
+class LanguageCache:
+    """Thread-safe bounded LRU cache for language detection results."""
+    
+    # Returned by get() on a miss, since None is a valid cached verdict
+    MISSING = object()
+    
+    def __init__(self, maxsize: int = 50000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Build the cache key for a snippet (whitespace-collapsed text)."""
+        return ' '.join(text.split())
+    
+    def get(self, key: str):
+        """Return the cached value for key, or MISSING."""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return self.MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: str, value):
+        """Store a value, evicting the least recently used entries if full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def resize(self, maxsize: int):
+        """Change the capacity, evicting entries that no longer fit."""
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > max(maxsize, 0):
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+    
+    def stats(self) -> dict:
+        """Return size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Process-wide caches: final (language, strategy) verdicts, and raw langdetect
+# results shared by is_home_text (Strategy 7) and detect_language
+LANGUAGE_CACHE = LanguageCache(int(os.environ.get('LANGUAGE_CACHE_SIZE', 50000)))
+LANGDETECT_CACHE = LanguageCache(int(os.environ.get('LANGUAGE_CACHE_SIZE', 50000)))
+
+
+def configure_language_cache(maxsize: int):
+    """Resize the process-wide language detection caches."""
+    LANGUAGE_CACHE.resize(maxsize)
+    LANGDETECT_CACHE.resize(maxsize)
+
+
+def language_cache_stats() -> dict:
+    """Return hit/miss counters for the process-wide language caches."""
+    return {
+        'verdicts': LANGUAGE_CACHE.stats(),
+        'langdetect': LANGDETECT_CACHE.stats(),
+    }
+
+
+class TextOwnerCollector:
+    """Attributes text nodes to their owning text tags from start/text/end events.
+    
+    Modes:
+        all       - every text tag with all of its nested text (original behaviour)
+        innermost - each text node is reported once, under its nearest text tag
+        outermost - each text node is reported once, under its topmost text tag
+    """
+    
+    MODES = ('all', 'innermost', 'outermost')
+    
+    def __init__(self, text_tags: Iterable[str], clean_text: Callable[[str], str],
+                 mode: str = 'all'):
+        if mode not in self.MODES:
+            raise Exception(f"Unknown extraction mode: {mode}")
+        self.mode = mode
+        self.clean_text = clean_text
+        self.tag_rank = {tag: rank for rank, tag in enumerate(text_tags)}
+        self.pieces = []   # stripped text nodes in document order
+        # open text tags: [tag, slot, first piece, own pieces, path, nested text tags
+        # left open inside it in outermost mode]
+        self.frames = []
+        self.slots = []    # (path, tag, text) per text tag, in document order
+    
+    def start(self, tag: str):
+        """Open an element."""
+        if tag not in self.tag_rank:
+            return
+        if self.mode == 'outermost' and self.frames:
+            # Suppressed, but counted so its end tag does not close the outer frame
+            self.frames[-1][5] += 1
+            return
+        # Path of enclosing text tags, e.g. 'footer>p>a'
+        path = f"{self.frames[-1][4]}>{tag}" if self.frames else tag
+        self.frames.append([tag, len(self.slots), len(self.pieces), [], path, 0])
+        self.slots.append(None)
+    
+    def text(self, text: str):
+        """Record a text node inside the currently open elements."""
+        text = text.strip()
+        if not text:
+            return
+        self.pieces.append(text)
+        if self.mode == 'innermost' and self.frames:
+            self.frames[-1][3].append(text)
+    
+    def end(self, tag: str):
+        """Close an element and resolve its text."""
+        if tag not in self.tag_rank or not self.frames:
+            return
+        if self.frames[-1][5]:
+            self.frames[-1][5] -= 1
+            return
+        if self.frames[-1][0] != tag:
+            return
+        tag, slot, first, own, path, _ = self.frames.pop()
+        if self.mode == 'innermost':
+            text = ' '.join(own)
+        else:
+            text = ' '.join(self.pieces[first:])
+        cleaned_text = self.clean_text(text)
+        if cleaned_text:
+            self.slots[slot] = (path, tag, cleaned_text)
+        if not self.frames:
+            # Nothing can reference earlier pieces any more
+            self.pieces.clear()
+    
+    def results(self) -> List[Tuple[str, str]]:
+        """Return (tag, text) tuples grouped by tag in TEXT_TAGS order."""
+        return [(tag, text) for _, tag, text in self.blocks()]
+    
+    def blocks(self) -> List[Tuple[str, str, str]]:
+        """Return (path, tag, text) tuples in the same order as results()."""
+        while self.frames:
+            self.end(self.frames[-1][0])
+        blocks = [slot for slot in self.slots if slot is not None]
+        blocks.sort(key=lambda block: self.tag_rank[block[1]])
+        return blocks
+
+
+class StreamingTextParser(HTMLParser):
+    """Tokenizes HTML and feeds text events straight into a TextOwnerCollector.
+    
+    No document tree is built. Tags are nested the way BeautifulSoup's
+    html.parser builder nests them (void elements never open, an end tag
+    closes everything up to its most recent matching start tag, stray end
+    tags are dropped), so the collector sees the same events as a DOM walk.
+    """
+    
+    # Elements that never have content
+    VOID_TAGS = frozenset([
+        'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen',
+        'link', 'menuitem', 'meta', 'param', 'source', 'track', 'wbr',
+        'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex',
+        'nextid', 'spacer',
+    ])
+    
+    # Ruby annotations: BeautifulSoup stores every string inside them as a
+    # special string type that get_text() skips
+    SILENT_TAGS = frozenset(['rt', 'rp'])
+    
+    def __init__(self, collector: TextOwnerCollector, ignored_tags: Iterable[str]):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+        self.ignored_tags = frozenset(ignored_tags)
+        self.open_tags = []   # (tag, reported to the collector)
+        self.ignored_depth = 0
+        self.silent_depth = 0
+        self.data = []
+    
+    def flush(self):
+        """Hand buffered character data to the collector as one text node."""
+        if self.data:
+            if not self.ignored_depth and not self.silent_depth:
+                self.collector.text(''.join(self.data))
+            self.data.clear()
+    
+    def handle_starttag(self, tag, attrs):
+        self.flush()
+        if tag in self.VOID_TAGS:
+            return
+        if tag in self.ignored_tags:
+            self.ignored_depth += 1
+            self.open_tags.append((tag, False))
+            return
+        if tag in self.SILENT_TAGS:
+            self.silent_depth += 1
+        reported = not self.ignored_depth
+        if reported:
+            self.collector.start(tag)
+        self.open_tags.append((tag, reported))
+    
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in self.VOID_TAGS:
+            self.handle_endtag(tag)
+    
+    def handle_endtag(self, tag):
+        self.flush()
+        for index in range(len(self.open_tags) - 1, -1, -1):
+            if self.open_tags[index][0] == tag:
+                break
+        else:
+            return
+        while len(self.open_tags) > index:
+            name, reported = self.open_tags.pop()
+            if name in self.ignored_tags:
+                self.ignored_depth -= 1
+                continue
+            if name in self.SILENT_TAGS:
+                self.silent_depth -= 1
+            if reported:
+                self.collector.end(name)
+    
+    def handle_data(self, data):
+        self.data.append(data)
+    
+    def unknown_decl(self, data):
+        # <![CDATA[...]]> sections count as text, as in BeautifulSoup
+        if data.upper().startswith('CDATA['):
+            self.data.append(data[len('CDATA['):])
+    
+    def handle_comment(self, data):
+        self.flush()
+    
+    def handle_decl(self, decl):
+        self.flush()
+    
+    def handle_pi(self, data):
+        self.flush()
+    
+    def close(self):
+        super().close()
+        self.flush()
+        while self.open_tags:
+            name, reported = self.open_tags.pop()
+            if reported:
+                self.collector.end(name)
+
 
 class WebTextExtractor:
     """Extracts and analyzes text content from web pages."""
@@ -53,87 +378,138 @@ class WebTextExtractor:
     
     # Tags to completely ignore (non-visible content)
     IGNORED_TAGS = ['script', 'style', 'meta', 'link', 'noscript', 'template']
+    IGNORED_TAG_SET = frozenset(IGNORED_TAGS)
+    
+    # Parser backends: BeautifulSoup tree builders, or a tree-less tokenizer
+    PARSERS = ('html.parser', 'lxml', 'stream')
     
-    # Comprehensive Polish detection patterns
-    POLISH_PATTERNS = {
-        # Extensive Polish words database
-        'common_words': [
-            # Basic words
-            'aby', 'ale', 'albo', 'jako', 'oraz', 'tylko', 'także', 'bardzo', 
-            'można', 'należy', 'przez', 'gdzie', 'które', 'które', 'wszystkich',
-            'zostać', 'będzie', 'został', 'została', 'zostało', 'zostały',
-            'może', 'mogą', 'musi', 'musisz', 'powinien', 'powinna', 'powinno',
-            'więc', 'więcej', 'podczas', 'między', 'wiele', 'każdy', 'każda',
-            'jakie', 'jaki', 'jaka', 'tutaj', 'teraz', 'wtedy', 'nigdy',
-            'zawsze', 'często', 'czasem', 'czasami', 'dziś', 'dzisiaj',
-            # Action words frequently seen
-            'poznaj', 'kup', 'kupuj', 'stworzony', 'dla', 'spersonalizuj',
-            'modele', 'model', 'wybierz', 'sprawdź', 'zobacz', 'odkryj',
-            'znajdź', 'dowiedz', 'się', 'więcej', 'informacji', 'produkty',
-            'usługi', 'sklep', 'wsparcie', 'pomoc', 'kontakt', 'firma',
-            'biznes', 'biznesu', 'rozrywka', 'aplikacje', 'gry', 'muzyka',
-            'filmy', 'książki', 'portfel', 'płatności', 'bezpieczeństwo',
-            # Polish tech/Apple terms
-            'aparat', 'zdjęcia', 'wideo', 'nagrywanie', 'odtwarzanie',
-            'wyświetlacz', 'ekran', 'bateria', 'ładowanie', 'pamięć',
-            'procesor', 'kamera', 'mikrofon', 'głośnik', 'słuchawki',
-            # Website/navigation terms that are clearly Polish
-            'mapa', 'witryny', 'stopka', 'akcesoria', 'aplikacja', 'apka',
-            'konto', 'konta', 'sklep', 'sklepu', 'portfel',
-            # More Polish words from the misclassified examples
-            'do', 'w', 'na', 'za', 'pod', 'nad', 'przy', 'bez', 'od', 'po',
-            'ze', 'we', 'przed', 'między', 'przez', 'według', 'podczas'
-        ],
-        
-        # Polish-specific character combinations
-        'char_patterns': [
-            'ą', 'ć', 'ę', 'ł', 'ń', 'ó', 'ś', 'ź', 'ż',  # Polish diacritics
-            'cz', 'sz', 'rz', 'dz', 'dż', 'dź',  # Polish digraphs
-        ],
-        
-        # Comprehensive Polish endings
-        'endings': [
-            'ość', 'anie', 'enie', 'owy', 'owa', 'owe', 'emy', 'ecie',
-            'ować', 'ąć', 'nąć', 'ić', 'yć', 'ych', 'ymi', 'ami', 'ach',
-            'iej', 'iego', 'ych', 'ymi', 'ę', 'ą', 'em', 'ie', 'ów',
-            'uj', 'esz', 'isz', 'asz', 'uje', 'uję', 'iesz'
-        ],
-        
-        # Polish possessive and genitive patterns
-        'possessive_patterns': [
-            "'a", "'em", "'ie", "'y", "'ę", "'ą"  # iPhone'a, Apple'a etc
-        ],
-        
-        # Polish phrases that are commonly misidentified
-        'polish_phrases': [
-            'mapa witryny',      # Was classified as Swahili 
-            'akcesoria do',      # Was classified as Portuguese
-            'stopka apple',      # Was classified as Slovenian
-            'aplikacja apple',   # Was classified as Slovenian
-            'konto w apple',     # Contains Polish preposition
-            'iphone i mac',      # Polish conjunction 'i'
-            'iphone i apple',    # Polish conjunction 'i'
-            'iphone i airpods'   # Polish conjunction 'i'
-        ]
+    # Statistical language identifiers used after the home-language rules
+    LANGUAGE_BACKENDS = ('langdetect', 'ngram')
+    
+    # Processing stages reported to progress callbacks, in order
+    STAGES = ('fetch', 'parse', 'extract', 'classify', 'render')
+    
+    # Rule packs (see rule_packs.py) of the languages filtered out by default
+    DEFAULT_HOME_LANGUAGES = ('pl',)
+    
+    # Default request headers for every session (plus Accept-Encoding, see session)
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     }
     
-    def __init__(self, timeout: int = 30):
-        """Initialize the extractor with request timeout."""
+    # Streaming fetch settings
+    CHUNK_SIZE = 64 * 1024
+    # Snippets classified per step when results are streamed (iter_non_polish)
+    STREAM_BATCH = 64
+    META_SCAN_BYTES = 4096
+    CHARSET_RE = re.compile(rb'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+    META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+    BOMS = (
+        (codecs.BOM_UTF8, 'utf-8-sig'),
+        (codecs.BOM_UTF16_LE, 'utf-16'),
+        (codecs.BOM_UTF16_BE, 'utf-16'),
+    )
+    
+    # Responses worth retrying when max_retries > 0
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
+    def __init__(self, timeout: int = 30, extraction_mode: str = 'all',
+                 verbose: bool = True, pool_connections: int = 10,
+                 pool_maxsize: int = 10, max_retries: int = 0,
+                 backoff_factor: float = 0.5, http_cache: Optional[HttpCache] = None,
+                 max_bytes: int = 10 * 1024 * 1024, parser: str = 'html.parser',
+                 classify_workers: int = 1, parallel_threshold: int = 500,
+                 language_backend: str = 'langdetect',
+                 adjudicator: Optional['LLMAdjudicator'] = None,
+                 home_languages: Sequence[str] = DEFAULT_HOME_LANGUAGES):
+        """Initialize the extractor with request timeout and text extraction mode.
+        
+        All threads share one HTTPAdapter, so keep-alive connections are
+        pooled (``pool_connections`` hosts, ``pool_maxsize`` connections per
+        host) and failed GETs are retried ``max_retries`` times with
+        exponential backoff. The extractor is safe to share between threads.
+        
+        With an ``http_cache``, revisited pages are revalidated with
+        If-None-Match/If-Modified-Since and unchanged pages reuse both the
+        cached body and its cached analysis. Page bodies are cut off after
+        ``max_bytes`` (after decompression).
+        
+        ``parser`` selects the HTML backend (see PARSERS); 'stream' tokenizes
+        without building a document tree.
+        
+        With ``classify_workers`` > 1, pages with at least
+        ``parallel_threshold`` snippets are classified in a process pool.
+        
+        ``language_backend`` picks the statistical identifier behind the
+        home-language rules: 'langdetect' (per snippet) or 'ngram'
+        (vectorized batches over the same profiles, needs NumPy).
+        
+        An ``adjudicator`` re-checks low-confidence home-language verdicts
+        with a language model (see adjudicator.py).
+        
+        ``home_languages`` names the rule packs (see rule_packs.py) of the
+        languages the site is written in; text in any of them is filtered
+        out. The first pack whose rules match decides a snippet's language.
+        """
+        if extraction_mode not in TextOwnerCollector.MODES:
+            raise Exception(f"Unknown extraction mode: {extraction_mode}")
+        if parser not in self.PARSERS:
+            raise Exception(f"Unknown parser backend: {parser}")
+        if language_backend not in self.LANGUAGE_BACKENDS:
+            raise Exception(f"Unknown language backend: {language_backend}")
+        self.parser = parser
+        self.language_backend = language_backend
+        self.home_languages = tuple(dict.fromkeys(home_languages))
+        self.home_rules = load_rule_packs(self.home_languages)
+        self.home_language_set = frozenset(self.home_languages)
+        # Packs by name and content, so edited packs do not reuse cached results
+        self.rules_id = ','.join(f"{rules.language}@{rules.digest}" for rules in self.home_rules)
+        self._verdict_prefix = f"{self.rules_id}\x00"
+        if language_backend != 'langdetect':
+            self._verdict_prefix = f"{language_backend}\x00{self._verdict_prefix}"
+        if language_backend == 'ngram':
+            # Fail now rather than silently classifying nothing later
+            self._ngram_identifier_class()
+        self.classify_workers = classify_workers
+        self.parallel_threshold = parallel_threshold
+        self._process_pool = None
+        self._pool_lock = threading.Lock()
         self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        
-        # Initialize OpenAI client if API key is available
-        self.openai_client = None
-        openai_api_key = os.environ.get("OPENAI_API_KEY")
-        if openai_api_key:
-            try:
-                self.openai_client = OpenAI(api_key=openai_api_key)
-            except Exception as e:
-                print(f"Warning: Could not initialize OpenAI client: {e}")
-                self.openai_client = None
+        self.extraction_mode = extraction_mode
+        self.verbose = verbose
+        self.http_cache = http_cache
+        self.max_bytes = max_bytes
+        
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=('GET', 'HEAD'),
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(pool_connections=pool_connections,
+                                   pool_maxsize=pool_maxsize,
+                                   max_retries=retry)
+        self._local = threading.local()
+        self.adjudicator = adjudicator
+    
+    @property
+    def session(self) -> 'requests.Session':
+        """Per-thread session; connections come from the shared adapter pool."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            from urllib3.util import make_headers
+            session = requests.Session()
+            session.headers.update(self.HEADERS)
+            # gzip/deflate, plus br when a brotli decoder is installed
+            session.headers.update(make_headers(accept_encoding=True))
+            session.mount('http://', self.adapter)
+            session.mount('https://', self.adapter)
+            self._local.session = session
+        return session
     
     def validate_url(self, url: str) -> bool:
         """Validate URL format."""
@@ -145,10 +521,47 @@ class WebTextExtractor:
     
     def fetch_page(self, url: str) -> str:
         """Fetch HTML content from URL with error handling."""
+        body, encoding, _ = self.fetch_document(url)
+        return str(body, encoding, errors='replace')
+    
+    def fetch_document(self, url: str) -> Tuple[bytes, str, Optional[List[Tuple[str, str, str]]]]:
+        """Fetch raw HTML bytes, revalidating against the HTTP cache if enabled.
+        
+        Returns (body, encoding, cached_elements). The body is streamed and
+        cut off after ``max_bytes``; the encoding comes from the Content-Type
+        header or a <meta charset> near the top of the page. cached_elements
+        is the stored analysis when the server confirmed the page is
+        unchanged, else None.
+        """
+        _, body, encoding, cached_elements = self.fetch_url(url)
+        return body, encoding, cached_elements
+    
+    def fetch_url(self, url: str) -> Tuple[str, bytes, str, Optional[List[Tuple[str, str, str]]]]:
+        """Like fetch_document, but also return the final URL after redirects."""
+        import requests
+        headers = self.http_cache.validators(url) if self.http_cache else {}
         try:
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            return response.text
+            with self.session.get(url, timeout=self.timeout, headers=headers,
+                                  stream=True) as response:
+                if response.status_code == 304 and headers:
+                    cached = self.http_cache.get(url)
+                    if cached is None:
+                        # Cache entry vanished underneath us; fetch unconditionally
+                        self.http_cache.discard(url)
+                        return self.fetch_url(url)
+                    body, encoding = cached
+                    return (url, body, encoding or 'utf-8',
+                            self.http_cache.get_result(url, self.analysis_key()))
+                
+                response.raise_for_status()
+                body = self._read_body(response, url)
+            
+            encoding = self.resolve_encoding(response.headers.get('Content-Type'), body)
+            if self.http_cache:
+                self.http_cache.store(url, body, encoding,
+                                      response.headers.get('ETag'),
+                                      response.headers.get('Last-Modified'))
+            return response.url, body, encoding, None
         except requests.exceptions.Timeout:
             raise Exception(f"Request timeout after {self.timeout} seconds")
         except requests.exceptions.ConnectionError:
@@ -158,6 +571,55 @@ class WebTextExtractor:
         except requests.exceptions.RequestException as e:
             raise Exception(f"Request failed: {str(e)}")
     
+    def _read_body(self, response: 'requests.Response', url: str) -> bytes:
+        """Read a streamed (already decompressed) body up to max_bytes."""
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+            body += chunk
+            if len(body) > self.max_bytes:
+                self.log(f"Warning: {url} is larger than {self.max_bytes} bytes, truncating")
+                del body[self.max_bytes:]
+                break
+        return bytes(body)
+    
+    def resolve_encoding(self, content_type: Optional[str], body: bytes) -> str:
+        """Pick the body encoding from headers, BOM or <meta charset> without sniffing."""
+        candidates = []
+        if content_type:
+            match = self.CHARSET_RE.search(content_type.encode('latin-1', errors='replace'))
+            if match:
+                candidates.append(match.group(1))
+        
+        for bom, bom_encoding in self.BOMS:
+            if body.startswith(bom):
+                candidates.insert(0, bom_encoding)
+                break
+        
+        match = self.META_CHARSET_RE.search(body, 0, self.META_SCAN_BYTES)
+        if match:
+            candidates.append(match.group(1))
+        
+        for candidate in candidates:
+            try:
+                return codecs.lookup(candidate.decode('ascii') if isinstance(candidate, bytes)
+                                     else candidate).name
+            except (LookupError, UnicodeDecodeError):
+                continue
+        return 'utf-8'
+    
+    def analysis_key(self) -> str:
+        """Identify the settings an analysis result depends on."""
+        key = (f"mode={self.extraction_mode};parser={self.parser};"
+               f"language={self.language_backend}")
+        if self.adjudicator is not None:
+            key += f";llm={self.adjudicator.model}"
+        return f"{key};home={self.rules_id}"
+    
+    def cache_analysis(self, url: str, elements: List[Tuple[str, str, str]]):
+        """Remember the analysis of the page body last fetched for a URL."""
+        if self.http_cache:
+            self.http_cache.store_result(url, self.analysis_key(), elements)
+    
     def clean_text(self, text: str) -> str:
         """Clean and normalize text content."""
         if not text:
@@ -177,208 +639,385 @@ class WebTextExtractor:
         
         return text
     
+    @property
+    def home_name(self) -> str:
+        """Display name of the home languages, e.g. 'Polish' or 'Czech/Slovak'."""
+        return '/'.join(rules.name for rules in self.home_rules)
+    
+    def is_home_text(self, text: str) -> bool:
+        """Ultra-aggressive home-language detection for maximum accuracy."""
+        return self.home_verdict(text)[0] is not None
+    
+    def home_strategy(self, text: str) -> Optional[str]:
+        """Name the strategy that identifies text as a home language, or None if none does."""
+        return self.home_verdict(text)[1]
+    
     def is_polish_text(self, text: str) -> bool:
-        """Ultra-aggressive Polish text detection for maximum accuracy."""
-        if not text or len(text.strip()) < 3:
-            return False
+        """Polish detection whatever the home languages, as is_home_text with
+        home_languages=['pl']; kept for existing callers."""
+        return self.polish_strategy(text) is not None
+    
+    def polish_strategy(self, text: str) -> Optional[str]:
+        """Name the strategy that identifies text as Polish, or None if none does."""
+        if self.home_languages == ('pl',):
+            return self.home_strategy(text)
+        return self.home_verdict(text, load_rule_packs(('pl',)))[1]
+    
+    def rule_verdict(self, text: str, home_rules: Optional[Sequence['CompiledLanguageRules']] = None
+                     ) -> Tuple[Optional[str], Optional[str]]:
+        """Return (language, strategy) of the first home rule pack (or of
+        ``home_rules``) matching the text, or (None, None)."""
+        for rules in home_rules or self.home_rules:
+            strategy = rules.strategy(text)
+            if strategy is not None:
+                return rules.language, strategy
+        return None, None
+    
+    def home_verdict(self, text: str, home_rules: Optional[Sequence['CompiledLanguageRules']] = None
+                     ) -> Tuple[Optional[str], Optional[str]]:
+        """Return (home language, strategy) identifying the text, or (None, None).
         
-        text_lower = text.lower().strip()
-        words = text_lower.split()
-        
-        # Strategy 1: Polish diacritics (any Polish character = Polish text)
-        polish_chars = sum(1 for char in text if char in 'ąćęłńóśźż')
-        if polish_chars > 0:
-            return True
-        
-        # Strategy 2: Polish possessive patterns (iPhone'a, Apple'a etc)
-        for pattern in self.POLISH_PATTERNS['possessive_patterns']:
-            if pattern in text_lower:
-                return True
-        
-        # Strategy 2.5: Polish phrases that are commonly misidentified
-        for phrase in self.POLISH_PATTERNS['polish_phrases']:
-            if phrase in text_lower:
-                return True
-        
-        # Strategy 3: Exact Polish word matches (much more aggressive)
-        polish_word_count = 0
-        for word in words:
-            # Remove punctuation and check
-            clean_word = word.strip('.,!?;:"()[]{}')
-            if clean_word in self.POLISH_PATTERNS['common_words']:
-                polish_word_count += 1
-        
-        if len(words) > 0:
-            polish_word_ratio = polish_word_count / len(words)
-            # Much lower threshold - even 1 Polish word in short text
-            if len(words) <= 3 and polish_word_count >= 1:  # Short phrases
-                return True
-            elif polish_word_ratio > 0.1:  # 10% threshold instead of 15%
-                return True
-        
-        # Strategy 4: Polish character combinations (more sensitive)
-        polish_patterns = sum(1 for pattern in self.POLISH_PATTERNS['char_patterns'] 
-                             if pattern in text_lower)
-        if polish_patterns >= 1:  # Even 1 pattern is enough
-            return True
-        
-        # Strategy 5: Polish word endings (more aggressive)
-        polish_endings = 0
-        for word in words:
-            clean_word = word.strip('.,!?;:"()[]{}')
-            for ending in self.POLISH_PATTERNS['endings']:
-                if clean_word.endswith(ending):
-                    polish_endings += 1
-                    break
+        ``home_rules`` replaces the extractor's home-language packs.
+        """
+        if not text or len(text.strip()) < 3:
+            return None, None
         
-        if len(words) > 0 and polish_endings / len(words) > 0.05:  # 5% threshold
-            return True
-        
-        # Strategy 6: Single word Polish detection for very short text
-        if len(words) == 1:
-            clean_word = words[0].strip('.,!?;:"()[]{}')
-            if (clean_word in self.POLISH_PATTERNS['common_words'] or 
-                any(ending in clean_word for ending in self.POLISH_PATTERNS['endings']) or
-                any(pattern in clean_word for pattern in self.POLISH_PATTERNS['char_patterns'])):
-                return True
-        
-        # Strategy 6.5: Special Polish conjunction detection ('i' = and)
-        # Phrases like "iPhone i Mac", "iPhone i Apple" are clearly Polish
-        if ' i ' in text_lower and len(words) >= 3:
-            # Check if it's "X i Y" pattern where X and Y are brands/products
-            words_around_i = []
-            for i, word in enumerate(words):
-                if word == 'i' and i > 0 and i < len(words) - 1:
-                    words_around_i.extend([words[i-1], words[i+1]])
-            
-            # If we have brand names around 'i', it's likely Polish
-            brand_terms = ['iphone', 'apple', 'mac', 'airpods', 'watch', 'ipad', 'imac']
-            if any(term in ' '.join(words_around_i).lower() for term in brand_terms):
-                return True
+        # Strategies 1-6.5: compiled rule packs, each evaluated in one pass
+        language, strategy = self.rule_verdict(text, home_rules)
+        if language is not None:
+            return language, strategy
         
         # Strategy 7: Use langdetect ONLY if our patterns didn't catch it
+        if len(text.strip()) >= 10:
+            language = self.identify_language(text)
+            languages = (self.home_language_set if home_rules is None
+                         else {rules.language for rules in home_rules})
+            if language in languages:
+                return language, self.language_backend
+        
+        return None, None
+    
+    def langdetect(self, text: str) -> Optional[str]:
+        """Run langdetect on a snippet once and remember the result process-wide."""
+        key = LanguageCache.normalize(text)
+        detected_lang = LANGDETECT_CACHE.get(key)
+        if detected_lang is not LanguageCache.MISSING:
+            return detected_lang
+        
+        from langdetect import detect, LangDetectException
+        load_language_profiles()
         try:
-            if len(text.strip()) >= 10:
-                detected_lang = detect(text)
-                if detected_lang == 'pl':
-                    return True
-        except:
-            pass
+            detected_lang = detect(text)
+        except LangDetectException:
+            # No usable features: a verdict like any other
+            detected_lang = None
+        # Any other failure propagates uncached, so it cannot stick to the snippet
         
-        return False
+        LANGDETECT_CACHE.put(key, detected_lang)
+        return detected_lang
+    
+    def load_detector(self):
+        """Load the statistical language detector now, so threads started
+        afterwards never wait on (or race) its first load."""
+        load_language_profiles()
+        if self.language_backend == 'ngram':
+            self.ngram_identifier()
+    
+    def identify_language(self, text: str) -> Optional[str]:
+        """Identify a snippet's language with the configured statistical backend."""
+        if self.language_backend == 'ngram':
+            return self.ngram_identifier().identify([text])[0][0]
+        return self.langdetect(text)
+    
+    def _ngram_identifier_class(self):
+        """Import the vectorized identifier, which needs NumPy."""
+        try:
+            from ngram_classifier import NgramLanguageIdentifier
+        except ImportError as e:
+            raise Exception(f"The ngram language backend requires {e.name} "
+                            f"(pip install {e.name})")
+        return NgramLanguageIdentifier
+    
+    def ngram_identifier(self):
+        """Return the shared vectorized n-gram identifier, loading it on first use."""
+        return self._ngram_identifier_class().shared()
+    
+    def verdict_key(self, text: str) -> str:
+        """Cache key for a detect_language() verdict under this extractor's settings."""
+        return self._verdict_prefix + LanguageCache.normalize(text)
     
     def detect_language(self, text: str) -> Optional[str]:
-        """Detect language of text snippet with enhanced Polish detection."""
+        """Detect language of text snippet with enhanced home-language detection."""
+        return self.verdict(text)[0]
+    
+    def verdict(self, text: str) -> Tuple[Optional[str], str]:
+        """Return (language, strategy) for a snippet, cached process-wide."""
+        key = self.verdict_key(text)
+        verdict = LANGUAGE_CACHE.get(key)
+        if verdict is not LanguageCache.MISSING:
+            return verdict
+        
+        verdict = self.decide_language(text)
+        PIPELINE_METRICS.count_verdict(verdict[1])
+        if verdict[1] != 'error':
+            LANGUAGE_CACHE.put(key, verdict)
+        return verdict
+    
+    def decide_language(self, text: str) -> Tuple[Optional[str], str]:
+        """Run the full detection cascade for a snippet, without caching.
+        
+        Returns (language, strategy), where strategy names the rule that
+        decided: a home-language rule, the statistical backend, 'too_short',
+        or 'error' when detection failed (such verdicts must not be cached).
+        """
         try:
             # Skip very short text for better accuracy
             if len(text.strip()) < 5:
-                return None
+                return None, 'too_short'
             
-            # First check if it's Polish using our enhanced detection
-            if self.is_polish_text(text):
-                return 'pl'
+            # First check for a home language using our enhanced detection
+            language, strategy = self.home_verdict(text)
+            if language is not None:
+                return language, strategy
             
-            # For non-Polish text, use langdetect
+            # For foreign text, reuse the langdetect result from Strategy 7
             if len(text.strip()) >= 10:
-                detected_lang = detect(text)
-                return detected_lang
+                return self.identify_language(text), self.language_backend
             else:
-                return None
+                return None, 'too_short'
                 
-        except LangDetectException:
-            # If langdetect fails, return None (TextBlob doesn't have detect_language)
-            return None
         except Exception:
-            return None
+            return None, 'error'
+    
+    def parse_html(self, html_content: Union[str, bytes],
+                   encoding: Optional[str] = None) -> 'BeautifulSoup':
+        """Build a document tree with the configured BeautifulSoup backend."""
+        from bs4 import BeautifulSoup, FeatureNotFound
+        parser = 'html.parser' if self.parser == 'stream' else self.parser
+        try:
+            if isinstance(html_content, bytes):
+                return BeautifulSoup(html_content, parser, from_encoding=encoding)
+            return BeautifulSoup(html_content, parser)
+        except FeatureNotFound:
+            raise Exception(f"The {parser} parser backend is not installed "
+                            f"(pip install {parser})")
+    
+    def parse_text_elements(self, html_content: Union[str, bytes],
+                            encoding: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Parse HTML with the configured backend and extract (tag, text) tuples."""
+        if self.parser == 'stream':
+            return self.stream_text_elements(html_content, encoding)
+        return self.extract_text_elements(self.parse_html(html_content, encoding))
+    
+    def extract_blocks(self, html_content: Union[str, bytes],
+                       encoding: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        """Parse HTML and return (tag path, tag, text) tuples, timing each stage."""
+        if self.parser == 'stream':
+            with self.timed_stage('extract'):
+                return self.stream_text_elements(html_content, encoding, blocks=True)
+        with self.timed_stage('parse'):
+            soup = self.parse_html(html_content, encoding)
+        with self.timed_stage('extract'):
+            return self.extract_text_elements(soup, blocks=True)
     
-    def extract_text_elements(self, soup: BeautifulSoup) -> List[Tuple[str, str]]:
-        """Extract text content from all relevant HTML elements."""
-        text_elements = []
+    def stream_text_elements(self, html_content: Union[str, bytes],
+                             encoding: Optional[str] = None,
+                             mode: Optional[str] = None,
+                             blocks: bool = False) -> List[tuple]:
+        """Extract (tag, text) tuples by tokenizing HTML without building a tree.
         
-        # Remove ignored tags completely
-        for tag_name in self.IGNORED_TAGS:
-            for tag in soup.find_all(tag_name):
-                tag.decompose()
+        With ``blocks``, (tag path, tag, text) tuples are returned instead.
+        """
+        collector = TextOwnerCollector(self.TEXT_TAGS, self.clean_text,
+                                       mode or self.extraction_mode)
+        parser = StreamingTextParser(collector, self.IGNORED_TAGS)
         
-        # Remove comments
-        for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
-            comment.extract()
+        if isinstance(html_content, bytes):
+            # Decode chunk by chunk so no full-size text copy is made
+            decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+            for start in range(0, len(html_content), self.CHUNK_SIZE):
+                parser.feed(decoder.decode(html_content[start:start + self.CHUNK_SIZE]))
+            parser.feed(decoder.decode(b'', final=True))
+        else:
+            parser.feed(html_content)
+        parser.close()
         
-        # Extract text from relevant tags
-        for tag_name in self.TEXT_TAGS:
-            elements = soup.find_all(tag_name)
-            
-            for element in elements:
-                # Get the text content of the element (includes nested text)
-                text_content = element.get_text(separator=' ', strip=True)
-                
-                # Clean the extracted text
-                cleaned_text = self.clean_text(text_content)
-                
-                if cleaned_text:
-                    text_elements.append((tag_name, cleaned_text))
+        return collector.blocks() if blocks else collector.results()
+    
+    def extract_text_elements(self, soup: 'BeautifulSoup',
+                              mode: Optional[str] = None,
+                              blocks: bool = False) -> List[tuple]:
+        """Extract text content from all relevant HTML elements in a single DOM walk.
         
-        return text_elements
+        With ``blocks``, (tag path, tag, text) tuples are returned instead.
+        """
+        from bs4 import CData, NavigableString, Tag
+        collector = TextOwnerCollector(self.TEXT_TAGS, self.clean_text,
+                                       mode or self.extraction_mode)
+        
+        # Each stack entry is an iterator over the children of an open tag;
+        # names tracks the tag that iterator belongs to so we can close it.
+        stack = [iter(soup.contents)]
+        names = [None]
+        while stack:
+            for node in stack[-1]:
+                node_type = type(node)
+                if node_type is NavigableString or node_type is CData:
+                    collector.text(node)
+                elif node_type is Tag:
+                    # Skip non-visible subtrees instead of decomposing them
+                    if node.name in self.IGNORED_TAG_SET:
+                        continue
+                    collector.start(node.name)
+                    stack.append(iter(node.contents))
+                    names.append(node.name)
+                    break
+                # Comments, doctypes and other special strings are ignored
+            else:
+                stack.pop()
+                name = names.pop()
+                if name is not None:
+                    collector.end(name)
+        
+        return collector.blocks() if blocks else collector.results()
     
-    def filter_non_polish(self, text_elements: List[Tuple[str, str]]) -> List[Tuple[str, str, str]]:
-        """Filter out Polish content and return non-Polish text with detected language."""
+    def filter_non_polish(self, text_elements: List[Tuple[str, str]],
+                          budget: Optional['PageBudget'] = None,
+                          parallel: Optional[bool] = None) -> List[Tuple[str, str, str]]:
+        """Filter out home-language content and return foreign text with detected language."""
         non_polish_elements = []
+        languages = self.classify_texts([text for _, text in text_elements], budget, parallel)
         
-        for tag_name, text in text_elements:
-            detected_lang = self.detect_language(text)
-            
-            # Skip if language detection failed or if it's Polish
-            if detected_lang is None or detected_lang == 'pl':
+        for (tag_name, text), detected_lang in zip(text_elements, languages):
+            # Skip if language detection failed or if it's a home language
+            if detected_lang is None or detected_lang in self.home_language_set:
                 continue
             
             non_polish_elements.append((tag_name, detected_lang, text))
         
         return non_polish_elements
     
-    def generate_html_table(self, elements: List[Tuple[str, str, str]]) -> str:
-        """Generate HTML table with non-Polish content."""
-        if not elements:
-            return """
-            <html>
-            <head>
-                <title>Non-Polish Text Extraction Results</title>
-                <style>
-                    body { font-family: Arial, sans-serif; margin: 20px; }
-                    .no-content { text-align: center; color: #666; padding: 20px; }
-                </style>
-            </head>
-            <body>
-                <h1>Non-Polish Text Extraction Results</h1>
-                <div class="no-content">
-                    <p>No non-Polish text content found on this page.</p>
-                </div>
-            </body>
-            </html>
-            """
+    def classify_texts(self, texts: List[str],
+                       budget: Optional['PageBudget'] = None,
+                       parallel: Optional[bool] = None) -> List[Optional[str]]:
+        """Detect the language of many snippets, then let the adjudicator (if
+        any) re-decide the low-confidence home-language verdicts.
+
+        A page classified in parts passes its adjudication ``budget`` and
+        whether it is large enough for the process pool (``parallel``) to
+        each part; by default the size of ``texts`` decides.
+        """
+        verdicts = self._classify_texts(texts, parallel)
+        if self.adjudicator is not None:
+            with self.timed_stage('adjudicate'):
+                return self.adjudicator.review(texts, verdicts, budget)
+        return [language for language, _ in verdicts]
+    
+    def _classify_texts(self, texts: List[str],
+                        parallel: Optional[bool] = None) -> List[Tuple[Optional[str], str]]:
+        """Return (language, strategy) for many snippets, in a process pool for large pages."""
+        if self.language_backend == 'ngram':
+            return self._classify_batch(texts)
+        if parallel is None:
+            parallel = len(texts) >= self.parallel_threshold
+        if self.classify_workers <= 1 or not parallel:
+            return [self.verdict(text) for text in texts]
         
-        table_rows = ""
-        for i, (tag_name, language, text) in enumerate(elements, 1):
-            # Escape HTML content for safe display
-            escaped_text = html.escape(text)
-            escaped_tag = html.escape(tag_name)
-            escaped_lang = html.escape(language)
-            
-            table_rows += f"""
-                <tr>
-                    <td>{i}</td>
-                    <td><code>&lt;{escaped_tag}&gt;</code></td>
-                    <td><span class="lang-code">{escaped_lang}</span></td>
-                    <td class="text-content">{escaped_text}</td>
-                </tr>
-            """
+        # Only unique snippets missing from this process's cache go to workers
+        verdicts = {}
+        pending = []
+        for text in texts:
+            key = self.verdict_key(text)
+            if key in verdicts:
+                continue
+            verdict = LANGUAGE_CACHE.get(key)
+            if verdict is LanguageCache.MISSING:
+                pending.append(text)
+            verdicts[key] = verdict
+        
+        if pending:
+            # A few chunks per worker keeps them busy without much IPC overhead
+            chunk_size = max(1, -(-len(pending) // (self.classify_workers * 4)))
+            chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+            pool = self._classification_pool()
+            for chunk, decisions in zip(chunks, pool.map(_classify_chunk, chunks)):
+                for text, verdict in zip(chunk, decisions):
+                    key = self.verdict_key(text)
+                    verdicts[key] = verdict
+                    PIPELINE_METRICS.count_verdict(verdict[1])
+                    if verdict[1] != 'error':
+                        LANGUAGE_CACHE.put(key, verdict)
+        
+        return [verdicts[self.verdict_key(text)] for text in texts]
+    
+    def _classify_batch(self, texts: List[str]) -> List[Tuple[Optional[str], str]]:
+        """Run the detection cascade for many snippets, identifying languages in one batch."""
+        verdicts = {}
+        pending = []
+        for text in texts:
+            key = self.verdict_key(text)
+            if key in verdicts:
+                continue
+            verdict = LANGUAGE_CACHE.get(key)
+            if verdict is LanguageCache.MISSING:
+                # Same cascade as decide_language, with the
+                # statistical step batched below
+                stripped = text.strip()
+                verdict = self.rule_verdict(text) if len(stripped) >= 5 else (None, None)
+                if verdict[1] is None:
+                    if len(stripped) >= 10:
+                        pending.append(text)
+                        # Filled in below; also keeps duplicates out of pending
+                        verdicts[key] = None
+                        continue
+                    verdict = (None, 'too_short')
+                PIPELINE_METRICS.count_verdict(verdict[1])
+                LANGUAGE_CACHE.put(key, verdict)
+            verdicts[key] = verdict
+        
+        if pending:
+            identified = self.ngram_identifier().identify(pending)
+            PIPELINE_METRICS.count_verdict(self.language_backend, len(pending))
+            for text, (detected_lang, _) in zip(pending, identified):
+                verdict = (detected_lang, self.language_backend)
+                key = self.verdict_key(text)
+                verdicts[key] = verdict
+                LANGUAGE_CACHE.put(key, verdict)
         
-        html_template = f"""
+        return [verdicts[self.verdict_key(text)] for text in texts]
+    
+    def classifier_options(self) -> dict:
+        """Constructor arguments a worker process needs to classify like this extractor."""
+        return {'language_backend': self.language_backend,
+                'home_languages': self.home_languages}
+    
+    def _classification_pool(self) -> 'ProcessPoolExecutor':
+        """Return the process pool used for classification, starting it on first use."""
+        with self._pool_lock:
+            if self._process_pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.classify_workers,
+                    initializer=_init_classifier_worker,
+                    initargs=(self.classifier_options(),),
+                )
+            return self._process_pool
+    
+    def close(self):
+        """Shut down the classification process pool, if one was started."""
+        with self._pool_lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown()
+                self._process_pool = None
+    
+    # Report page around the table rows, split so rows can be streamed
+    REPORT_HEAD_TEMPLATE = """
         <!DOCTYPE html>
         <html lang="en">
         <head>
             <meta charset="UTF-8">
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Non-Polish Text Extraction Results</title>
+            <title>Non-{home_name} Text Extraction Results</title>
             <style>
                 body {{
                     font-family: Arial, sans-serif;
@@ -457,10 +1096,10 @@ class WebTextExtractor:
         </head>
         <body>
             <div class="container">
-                <h1>Non-Polish Text Extraction Results</h1>
+                <h1>Non-{home_name} Text Extraction Results</h1>
                 
                 <div class="stats">
-                    <strong>Found {len(elements)} non-Polish text snippet(s)</strong>
+                    <strong>Found {count} non-{home_name} text snippet(s)</strong>
                 </div>
                 
                 <table>
@@ -473,7 +1112,8 @@ class WebTextExtractor:
                         </tr>
                     </thead>
                     <tbody>
-                        {table_rows}
+                        """
+    REPORT_TAIL = """
                     </tbody>
                 </table>
                 
@@ -484,47 +1124,412 @@ class WebTextExtractor:
         </body>
         </html>
         """
+    
+    def generate_html_table(self, elements: List[Tuple[str, str, str]]) -> str:
+        """Generate HTML table with non-Polish content."""
+        return ''.join(self.iter_html_table(elements))
+    
+    def write_html_table(self, elements: List[Tuple[str, str, str]], f: TextIO):
+        """Write the HTML table to a file incrementally."""
+        for chunk in self.iter_html_table(elements):
+            f.write(chunk)
+    
+    def iter_report(self, elements: Iterable[Tuple[str, str, str]],
+                    output_format: str = 'html', url: Optional[str] = None) -> Iterator[str]:
+        """Yield the elements serialized in one of serializers.FORMATS.
+        
+        Only the HTML report needs a list; the other formats stream any iterable.
+        """
+        if output_format == 'html':
+            return self.iter_html_table(list(elements))
+        if output_format == 'json':
+            return iter_json(elements, url)
+        if output_format == 'ndjson':
+            return iter_ndjson(elements)
+        if output_format == 'csv':
+            return iter_csv(elements)
+        raise Exception(f"Unknown output format: {output_format}")
+    
+    def iter_html_table(self, elements: List[Tuple[str, str, str]]) -> Iterator[str]:
+        """Yield the HTML table in chunks so large reports are never held in memory."""
+        if not elements:
+            yield f"""
+            <html>
+            <head>
+                <title>Non-{self.home_name} Text Extraction Results</title>
+                <style>
+                    body {{ font-family: Arial, sans-serif; margin: 20px; }}
+                    .no-content {{ text-align: center; color: #666; padding: 20px; }}
+                </style>
+            </head>
+            <body>
+                <h1>Non-{self.home_name} Text Extraction Results</h1>
+                <div class="no-content">
+                    <p>No non-{self.home_name} text content found on this page.</p>
+                </div>
+            </body>
+            </html>
+            """
+            return
+        
+        yield self.REPORT_HEAD_TEMPLATE.format(count=len(elements), home_name=self.home_name)
+        
+        for i, (tag_name, language, text) in enumerate(elements, 1):
+            # Escape HTML content for safe display
+            escaped_text = html.escape(text)
+            escaped_tag = html.escape(tag_name)
+            escaped_lang = html.escape(language)
+            
+            yield f"""
+                <tr>
+                    <td>{i}</td>
+                    <td><code>&lt;{escaped_tag}&gt;</code></td>
+                    <td><span class="lang-code">{escaped_lang}</span></td>
+                    <td class="text-content">{escaped_text}</td>
+                </tr>
+            """
         
-        return html_template
+        yield self.REPORT_TAIL
     
-    def process_url(self, url: str) -> str:
-        """Main processing function."""
+    def log(self, message: str, progress: Optional[ProgressCallback] = None,
+            stage: Optional[str] = None):
+        """Print a progress message and forward stage changes to a callback."""
+        if self.verbose:
+            print(message)
+        if progress is not None and stage is not None:
+            progress(stage, message)
+    
+    @contextmanager
+    def timed_stage(self, stage: str):
+        """Record how long the enclosed pipeline stage takes in PIPELINE_METRICS."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            PIPELINE_METRICS.observe_stage(stage, time.perf_counter() - start)
+    
+    def analyze_html(self, html_content: Union[str, bytes],
+                     progress: Optional[ProgressCallback] = None,
+                     encoding: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        """Parse HTML (text, or raw bytes in ``encoding``) and return its
+        non-Polish (tag, language, text) elements."""
+        text_elements = self.text_elements(html_content, progress, encoding)
+        
+        # Filter non-Polish content
+        self.log(f"Detecting languages and filtering non-{self.home_name} content...", progress, 'classify')
+        self.log(f"Using ultra-aggressive 8-layer {self.home_name} detection system...")
+        with self.timed_stage('classify'):
+            non_polish_elements = self.filter_non_polish(text_elements)
+        PIPELINE_METRICS.count_page('analyzed', len(text_elements), len(non_polish_elements))
+        polish_filtered = len(text_elements) - len(non_polish_elements)
+        self.log(f"Filtered out {polish_filtered} {self.home_name} text snippets")
+        self.log(f"Found {len(non_polish_elements)} non-{self.home_name} text snippets")
+        
+        return non_polish_elements
+    
+    def text_elements(self, html_content: Union[str, bytes],
+                      progress: Optional[ProgressCallback] = None,
+                      encoding: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Parse HTML and extract its (tag, text) tuples, timing each stage."""
+        # Parse HTML; raw bytes are decoded by the parser itself
+        self.log("Parsing HTML content...", progress, 'parse')
+        if self.parser == 'stream':
+            # The streaming backend extracts text while it tokenizes
+            self.log("Extracting text while tokenizing...", progress, 'extract')
+            with self.timed_stage('extract'):
+                text_elements = self.stream_text_elements(html_content, encoding)
+        else:
+            with self.timed_stage('parse'):
+                soup = self.parse_html(html_content, encoding)
+            
+            # Extract text elements
+            self.log("Extracting text from HTML elements...", progress, 'extract')
+            with self.timed_stage('extract'):
+                text_elements = self.extract_text_elements(soup)
+        self.log(f"Found {len(text_elements)} text elements")
+        return text_elements
+    
+    def extract_non_polish(self, url: str,
+                           progress: Optional[ProgressCallback] = None) -> List[Tuple[str, str, str]]:
+        """Fetch a URL and return its non-Polish (tag, language, text) elements."""
         # Validate URL
         if not self.validate_url(url):
             raise Exception("Invalid URL format")
         
         # Fetch page content
-        print(f"Fetching content from: {url}")
-        html_content = self.fetch_page(url)
+        self.log(f"Fetching content from: {url}", progress, 'fetch')
+        with self.timed_stage('fetch'):
+            body, encoding, cached_elements = self.fetch_document(url)
+        if cached_elements is not None:
+            self.log("Page not modified since last scan, reusing cached analysis")
+            PIPELINE_METRICS.count_page('cached')
+            return cached_elements
+        
+        non_polish_elements = self.analyze_html(body, progress, encoding)
+        self.cache_analysis(url, non_polish_elements)
+        return non_polish_elements
+    
+    def iter_non_polish(self, url: str,
+                        progress: Optional[ProgressCallback] = None) -> Iterator[Tuple[str, str, str]]:
+        """Like extract_non_polish, but yield elements as soon as their batch
+        of STREAM_BATCH snippets has been classified."""
+        if not self.validate_url(url):
+            raise Exception("Invalid URL format")
         
-        # Parse HTML
-        print("Parsing HTML content...")
-        soup = BeautifulSoup(html_content, 'html.parser')
+        self.log(f"Fetching content from: {url}", progress, 'fetch')
+        with self.timed_stage('fetch'):
+            body, encoding, cached_elements = self.fetch_document(url)
+        if cached_elements is not None:
+            self.log("Page not modified since last scan, reusing cached analysis")
+            PIPELINE_METRICS.count_page('cached')
+            yield from cached_elements
+            return
         
-        # Extract text elements
-        print("Extracting text from HTML elements...")
-        text_elements = self.extract_text_elements(soup)
-        print(f"Found {len(text_elements)} text elements")
+        text_elements = self.text_elements(body, progress, encoding)
+        self.log(f"Detecting languages and filtering non-{self.home_name} content...", progress, 'classify')
+        non_polish_elements = []
+        # The batches share one adjudication budget, and a large page sends
+        # every batch to the process pool
+        budget = self.adjudicator.page_budget() if self.adjudicator is not None else None
+        parallel = len(text_elements) >= self.parallel_threshold
+        # One classify sample per page, leaving out the time spent by the consumer
+        classify_seconds = 0.0
+        for start in range(0, len(text_elements), self.STREAM_BATCH):
+            batch_start = time.perf_counter()
+            batch = self.filter_non_polish(text_elements[start:start + self.STREAM_BATCH],
+                                           budget, parallel)
+            classify_seconds += time.perf_counter() - batch_start
+            non_polish_elements += batch
+            yield from batch
+        PIPELINE_METRICS.observe_stage('classify', classify_seconds)
         
-        # Filter non-Polish content
-        print("Detecting languages and filtering non-Polish content...")
-        print("Using ultra-aggressive 8-layer Polish detection system...")
-        non_polish_elements = self.filter_non_polish(text_elements) 
-        polish_filtered = len(text_elements) - len(non_polish_elements)
-        print(f"Filtered out {polish_filtered} Polish text snippets")
-        print(f"Found {len(non_polish_elements)} non-Polish text snippets")
+        PIPELINE_METRICS.count_page('analyzed', len(text_elements), len(non_polish_elements))
+        self.log(f"Found {len(non_polish_elements)} non-{self.home_name} text snippets")
+        self.cache_analysis(url, non_polish_elements)
+    
+    def fetch_and_analyze(self, url: str, slot=None) -> Tuple[str, bytes, str, List[Tuple[str, str, str]]]:
+        """Fetch a URL and return (final_url, body, encoding, non-Polish elements).
+        
+        The fetch runs inside ``slot`` when given, a context manager such as
+        a per-host semaphore. Unchanged pages reuse their cached analysis.
+        """
+        if not self.validate_url(url):
+            raise Exception("Invalid URL format")
+        with slot or nullcontext(), self.timed_stage('fetch'):
+            final_url, body, encoding, elements = self.fetch_url(url)
+        if elements is not None:
+            PIPELINE_METRICS.count_page('cached')
+        else:
+            elements = self.analyze_html(body, encoding=encoding)
+            self.cache_analysis(url, elements)
+        return final_url, body, encoding, elements
+    
+    def process_url(self, url: str, progress: Optional[ProgressCallback] = None) -> str:
+        """Main processing function.
+        
+        ``progress`` is called as progress(stage, message) when each stage
+        (see STAGES) starts; raising from it aborts processing.
+        """
+        non_polish_elements = self.extract_non_polish(url, progress)
         
         # Generate HTML table
-        print("Generating HTML table...")
-        html_output = self.generate_html_table(non_polish_elements)
+        self.log("Generating HTML table...", progress, 'render')
+        with self.timed_stage('render'):
+            html_output = self.generate_html_table(non_polish_elements)
         
         return html_output
+    
+    def process_urls(self, urls: Iterable[str], max_workers: int = 8,
+                     per_host_limit: int = 2) -> List[BatchResult]:
+        """Analyze many URLs concurrently over this extractor's session.
+        
+        Fetches run on a bounded thread pool with at most ``per_host_limit``
+        requests in flight per host. Returns (url, elements, error) tuples in
+        input order; exactly one of elements and error is None.
+        """
+        urls = list(urls)
+        host_limits = {}
+        host_limits_lock = threading.Lock()
+        
+        def host_limit(url: str) -> threading.Semaphore:
+            host = urlparse(url).netloc.lower()
+            with host_limits_lock:
+                if host not in host_limits:
+                    host_limits[host] = threading.BoundedSemaphore(per_host_limit)
+                return host_limits[host]
+        
+        def process_one(url: str) -> BatchResult:
+            try:
+                _, _, _, elements = self.fetch_and_analyze(url, host_limit(url))
+                return (url, elements, None)
+            except Exception as e:
+                return (url, None, str(e))
+        
+        self.load_detector()
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            return list(executor.map(process_one, urls))
+    
+    def generate_summary_table(self, results: List[BatchResult],
+                               report_files: List[Optional[str]]) -> str:
+        """Generate an HTML summary of a batch run linking to per-URL reports."""
+        table_rows = []
+        for i, ((url, elements, error), report_file) in enumerate(zip(results, report_files), 1):
+            escaped_url = html.escape(url)
+            if error is None:
+                status = f'<span class="ok">{len(elements)} non-{self.home_name} snippet(s)</span>'
+                report = f'<a href="{html.escape(report_file)}">{html.escape(report_file)}</a>'
+            else:
+                status = f'<span class="error">Error: {html.escape(error)}</span>'
+                report = ''
+            table_rows.append(f"""
+                <tr>
+                    <td>{i}</td>
+                    <td class="text-content">{escaped_url}</td>
+                    <td>{status}</td>
+                    <td>{report}</td>
+                </tr>
+            """)
+        
+        failed = sum(1 for _, _, error in results if error is not None)
+        return f"""
+        <!DOCTYPE html>
+        <html lang="en">
+        <head>
+            <meta charset="UTF-8">
+            <title>Non-{self.home_name} Text Extraction Batch Summary</title>
+            <style>
+                body {{ font-family: Arial, sans-serif; margin: 20px; background-color: #f5f5f5; }}
+                .container {{ max-width: 1200px; margin: 0 auto; background: white; padding: 20px; border-radius: 8px; }}
+                h1 {{ color: #333; text-align: center; }}
+                .stats {{ background: #e8f4f8; padding: 15px; border-radius: 5px; text-align: center; }}
+                table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
+                th, td {{ border: 1px solid #ddd; padding: 12px; text-align: left; vertical-align: top; }}
+                th {{ background-color: #f2f2f2; }}
+                .text-content {{ max-width: 500px; word-wrap: break-word; }}
+                .ok {{ color: #2e7d32; }}
+                .error {{ color: #c62828; }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <h1>Non-{self.home_name} Text Extraction Batch Summary</h1>
+                <div class="stats">
+                    <strong>Analyzed {len(results)} URL(s), {failed} failed</strong>
+                </div>
+                <table>
+                    <thead>
+                        <tr>
+                            <th style="width: 50px;">#</th>
+                            <th>URL</th>
+                            <th>Result</th>
+                            <th>Report</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {''.join(table_rows)}
+                    </tbody>
+                </table>
+            </div>
+        </body>
+        </html>
+        """
+
+
+# Sample page for warm_up: Polish and English text in the common text tags
+WARM_UP_HTML = """<!DOCTYPE html>
+<html lang="pl"><head><meta charset="utf-8"><title>Sklep internetowy</title></head>
+<body>
+<nav><a href="/">Strona główna</a> <a href="/en">English version</a></nav>
+<h1>Słuchawki bezprzewodowe z redukcją szumów</h1>
+<p>Zamów dzisiaj, a przesyłka dotrze do Ciebie jutro. Darmowa dostawa od 100 zł.</p>
+<p>Great sound quality, but the case feels a bit cheap.</p>
+<ul><li>Bluetooth 5.3</li><li>Waga: 250 g</li><li>Noise cancelling with transparency mode</li></ul>
+<button>Dodaj do koszyka</button> <span>iPhone i Mac</span>
+<footer><p>Wszelkie prawa zastrzeżone</p></footer>
+</body></html>
+""".encode('utf-8')
 
 
-def get_url_input() -> str:
+def warm_up(extractor: Optional[WebTextExtractor] = None) -> float:
+    """Load everything the first analysis would otherwise load, and return
+    the seconds it took.
+    
+    Loads the langdetect profiles (and the n-gram tables for that backend),
+    imports the HTTP and parser libraries and runs one sample analysis
+    through ``extractor``. Run it in a prefork server's master process so
+    workers inherit all of this copy-on-write. Sample verdicts and metrics
+    are discarded afterwards.
+    """
+    start = time.perf_counter()
+    extractor = extractor or WebTextExtractor(verbose=False)
+    extractor.load_detector()
+    # Imported for the side effect alone: forked workers inherit the loaded modules
+    importlib.import_module('requests')
+    if extractor.adjudicator is not None:
+        importlib.import_module('openai')
+    
+    verbose, extractor.verbose = extractor.verbose, False
+    try:
+        extractor.analyze_html(WARM_UP_HTML, encoding='utf-8')
+    finally:
+        extractor.verbose = verbose
+    
+    LANGUAGE_CACHE.clear()
+    LANGDETECT_CACHE.clear()
+    PIPELINE_METRICS.reset()
+    return time.perf_counter() - start
+
+
+# Extractor used by classification worker processes
+_worker_extractor = None
+
+
+def _init_classifier_worker(options: dict):
+    """Prepare a classification worker: seed and load langdetect once."""
+    global _worker_extractor
+    load_language_profiles()
+    _worker_extractor = WebTextExtractor(verbose=False, **options)
+
+
+def _classify_chunk(texts: List[str]) -> List[Tuple[Optional[str], str]]:
+    """Decide (language, strategy) for a chunk of unique snippets in a worker process."""
+    return [_worker_extractor.decide_language(text) for text in texts]
+
+
+def normalize_url(url: str) -> str:
+    """Strip whitespace and add a protocol if missing."""
+    url = url.strip()
+    if url and not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+
+def read_url_list(source: str) -> List[str]:
+    """Read URLs, one per line, from a file or '-' for stdin.
+    
+    Blank lines and lines starting with '#' are skipped.
+    """
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    
+    return [normalize_url(line) for line in lines
+            if line.strip() and not line.strip().startswith('#')]
+
+
+def report_filename(url: str, index: int, extension: str = 'html') -> str:
+    """Build a filesystem-safe report name for a URL in a batch."""
+    parsed = urlparse(url)
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', parsed.netloc + parsed.path).strip('_')
+    return f"{index:03d}_{slug[:80] or 'page'}.{extension}"
+
+
+def get_url_input(url: Optional[str] = None) -> str:
     """Get URL from command line argument or user input."""
-    if len(sys.argv) > 1:
-        return sys.argv[1]
+    if url:
+        return url
     else:
         try:
             return input("Enter the URL to analyze: ").strip()
@@ -533,35 +1538,325 @@ def get_url_input() -> str:
             sys.exit(0)
 
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Extract non-Polish text from web pages into HTML reports.")
+    parser.add_argument('url', nargs='?', help="URL to analyze (prompted for if omitted)")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="analyze every URL listed in FILE ('-' reads stdin)")
+    parser.add_argument('--archive', metavar='PATH',
+                        help="analyze saved pages offline: a directory, a tarball or a WARC file")
+    parser.add_argument('--archive-output', metavar='FILE',
+                        help="NDJSON output of --archive, resumed if it exists "
+                             "(default: OUTPUT_DIR/archive_results.ndjson)")
+    parser.add_argument('--crawl', action='store_true',
+                        help="crawl the site from URL (a page or a sitemap.xml) into one report")
+    parser.add_argument('--max-pages', type=int, default=50,
+                        help="pages to visit when crawling (default: 50)")
+    parser.add_argument('--max-depth', type=int, default=2,
+                        help="links to follow from the start page when crawling (default: 2)")
+    parser.add_argument('--crawl-delay', type=float, default=1.0,
+                        help="seconds between requests to the same host when crawling (default: 1)")
+    parser.add_argument('--site-wide-min-pages', type=int, default=2,
+                        help="report text repeated on this many crawled pages once as site-wide "
+                             "(default: 2, 0 disables)")
+    parser.add_argument('--output-dir', default='reports',
+                        help="directory for batch and crawl reports (default: reports)")
+    parser.add_argument('--workers', type=int, default=8,
+                        help="concurrent batch/crawl workers; archive processes, up to the CPU count (default: 8)")
+    parser.add_argument('--per-host', type=int, default=2,
+                        help="concurrent requests per host in batch/crawl mode (default: 2)")
+    parser.add_argument('--extraction-mode', choices=TextOwnerCollector.MODES, default='all',
+                        help="which text tags report nested text (default: all)")
+    parser.add_argument('--cache-dir',
+                        help="keep fetched pages and analyses here and revalidate them on revisit")
+    parser.add_argument('--cache-size', type=int, default=256,
+                        help="maximum HTTP cache size in MB (default: 256)")
+    parser.add_argument('--parser', choices=WebTextExtractor.PARSERS, default='html.parser',
+                        help="HTML parser backend (default: html.parser)")
+    parser.add_argument('--language-backend', choices=WebTextExtractor.LANGUAGE_BACKENDS,
+                        default='langdetect',
+                        help="statistical language identifier (default: langdetect)")
+    parser.add_argument('--home-languages', type=parse_languages, metavar='CODES',
+                        default=WebTextExtractor.DEFAULT_HOME_LANGUAGES,
+                        help="comma-separated rule packs of the site's own languages, whose "
+                             "text is filtered out, e.g. cs,sk (default: pl)")
+    parser.add_argument('--classify-workers', type=int, default=1,
+                        help="processes for language detection on large pages (default: 1)")
+    parser.add_argument('--llm-adjudication', action='store_true',
+                        help="ask a language model about low-confidence home-language verdicts "
+                             "(needs OPENAI_API_KEY or --llm-base-url)")
+    parser.add_argument('--llm-base-url',
+                        help="OpenAI-compatible API base URL (default: OPENAI_BASE_URL or OpenAI)")
+    parser.add_argument('--llm-model', default='gpt-4o-mini',
+                        help="model for LLM adjudication (default: gpt-4o-mini)")
+    parser.add_argument('--llm-batch-size', type=int, default=40,
+                        help="snippets per LLM request (default: 40)")
+    parser.add_argument('--llm-concurrency', type=int, default=4,
+                        help="concurrent LLM requests (default: 4)")
+    parser.add_argument('--llm-page-tokens', type=int, default=8000,
+                        help="LLM token budget per page (default: 8000)")
+    parser.add_argument('--llm-page-seconds', type=float, default=20.0,
+                        help="LLM time budget per page in seconds (default: 20)")
+    parser.add_argument('--max-page-size', type=int, default=10,
+                        help="truncate pages larger than this many MB (default: 10)")
+    parser.add_argument('--format', choices=tuple(FORMATS), default='html', dest='output_format',
+                        help="format of single-page and batch reports (default: html)")
+    parser.add_argument('--snapshot-dir',
+                        help="compare with the page's previous snapshot kept here, "
+                             "reclassify only changed blocks and write a change report")
+    parser.add_argument('--timings', action='store_true',
+                        help="print stage timings, verdict strategies and cache hit rates as JSON")
+    return parser.parse_args(argv)
+
+
+def build_http_cache(args: argparse.Namespace) -> Optional[HttpCache]:
+    """Create the HTTP cache requested on the command line, if any."""
+    if not args.cache_dir:
+        return None
+    return HttpCache(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024)
+
+
+def build_adjudicator(args: argparse.Namespace) -> Optional['LLMAdjudicator']:
+    """Create the LLM adjudicator requested on the command line, if any."""
+    if not args.llm_adjudication:
+        return None
+    from adjudicator import LLMAdjudicator
+    return LLMAdjudicator(model=args.llm_model, base_url=args.llm_base_url,
+                          batch_size=args.llm_batch_size,
+                          max_concurrency=args.llm_concurrency,
+                          page_token_budget=args.llm_page_tokens,
+                          page_time_budget=args.llm_page_seconds)
+
+
+def print_timings(before: dict):
+    """Print what the pipeline recorded since the ``before`` snapshot as JSON."""
+    report = PipelineMetrics.delta(before, PIPELINE_METRICS.snapshot())
+    report['total_seconds'] = round(sum(report['stages'].values()), 6)
+    report['language_cache'] = {
+        name: {key: stats[key] for key in ('hits', 'misses', 'hit_rate')}
+        for name, stats in language_cache_stats().items()
+    }
+    print("\nTimings:")
+    print(json.dumps(report, indent=2, sort_keys=True))
+
+
+def run_batch(args: argparse.Namespace):
+    """Analyze a list of URLs and write one report per URL plus a summary."""
+    before = PIPELINE_METRICS.snapshot()
+    urls = read_url_list(args.batch)
+    if not urls:
+        print("Error: No URLs provided")
+        sys.exit(1)
+    
+    print(f"Analyzing {len(urls)} URL(s) with {args.workers} worker(s)...")
+    extractor = WebTextExtractor(extraction_mode=args.extraction_mode, verbose=False,
+                                 pool_maxsize=max(10, args.workers),
+                                 http_cache=build_http_cache(args),
+                                 max_bytes=args.max_page_size * 1024 * 1024,
+                                 parser=args.parser,
+                                 classify_workers=args.classify_workers,
+                                 language_backend=args.language_backend,
+                                 home_languages=args.home_languages,
+                                 adjudicator=build_adjudicator(args))
+    results = extractor.process_urls(urls, max_workers=args.workers,
+                                     per_host_limit=args.per_host)
+    
+    os.makedirs(args.output_dir, exist_ok=True)
+    report_files = []
+    for index, (url, elements, error) in enumerate(results, 1):
+        if error is not None:
+            print(f"  FAILED {url}: {error}")
+            report_files.append(None)
+            continue
+        
+        filename = report_filename(url, index, FORMATS[args.output_format][1])
+        with open(os.path.join(args.output_dir, filename), 'w', encoding='utf-8', newline='') as f, \
+                extractor.timed_stage('render'):
+            f.writelines(extractor.iter_report(elements, args.output_format, url))
+        report_files.append(filename)
+        print(f"  {url}: {len(elements)} non-{extractor.home_name} snippet(s) -> {filename}")
+    
+    extractor.close()
+    
+    summary_path = os.path.join(args.output_dir, 'summary.html')
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        f.write(extractor.generate_summary_table(results, report_files))
+    
+    failed = report_files.count(None)
+    print(f"\nProcessed {len(results)} URL(s), {failed} failed")
+    print(f"Summary saved to: {summary_path}")
+    if args.timings:
+        print_timings(before)
+    
+    if failed == len(results):
+        sys.exit(1)
+
+
+def run_archive(args: argparse.Namespace):
+    """Analyze the saved pages of a directory, tarball or WARC file into NDJSON."""
+    from archive import ArchiveProcessor
+    
+    output_path = args.archive_output or os.path.join(args.output_dir, 'archive_results.ndjson')
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    # Analysis is CPU-bound: more processes than cores only adds contention
+    processor = ArchiveProcessor(workers=min(args.workers, os.cpu_count() or 1),
+                                 extractor_options={'extraction_mode': args.extraction_mode,
+                                                    'parser': args.parser,
+                                                    'language_backend': args.language_backend,
+                                                    'home_languages': args.home_languages},
+                                 max_bytes=args.max_page_size * 1024 * 1024)
+    print(f"Analyzing {args.archive} with {processor.workers} process(es)...")
+    stats = processor.process(args.archive, output_path)
+    
+    print(f"\nProcessed {stats['processed']} document(s) in {stats['seconds']:.1f}s "
+          f"({stats['docs_per_second']:.1f} docs/s), {stats['failed']} failed, "
+          f"{stats['skipped']} already done")
+    print(f"Results saved to: {output_path}")
+
+
+def run_snapshot(args: argparse.Namespace, url: str, extractor: WebTextExtractor,
+                 output_filename: str):
+    """Analyze a URL against its previous snapshot and write the full
+    report plus a report of what changed."""
+    from snapshots import SnapshotStore, iter_changes_json, iter_changes_report
+    
+    elements, appeared, resolved, previous_scan = SnapshotStore(args.snapshot_dir).analyze(
+        extractor, url)
+    extractor.close()
+    
+    print(f"Generating {args.output_format.upper()} report...")
+    with open(output_filename, 'w', encoding='utf-8', newline='') as f, \
+            extractor.timed_stage('render'):
+        f.writelines(extractor.iter_report(elements, args.output_format, url))
+    
+    # The change report is HTML next to an HTML report, JSON otherwise
+    if args.output_format == 'html':
+        changes_filename = 'non_polish_text_changes.html'
+        changes = iter_changes_report(url, appeared, resolved, previous_scan, extractor.home_name)
+    else:
+        changes_filename = 'non_polish_text_changes.json'
+        changes = iter_changes_json(url, appeared, resolved, previous_scan)
+    with open(changes_filename, 'w', encoding='utf-8') as f:
+        f.writelines(changes)
+    
+    if previous_scan is None:
+        print("No previous snapshot, saved one for the next run")
+    else:
+        print(f"Since the previous snapshot: {len(appeared)} non-{extractor.home_name} "
+              f"snippet(s) appeared, {len(resolved)} resolved")
+    print(f"Changes saved to: {changes_filename}")
+
+
+def run_crawl(args: argparse.Namespace, url: str):
+    """Crawl a site from a page or sitemap URL and write one aggregated report."""
+    from boilerplate import BoilerplateTracker
+    from crawler import Crawler, iter_crawl_report
+    
+    before = PIPELINE_METRICS.snapshot()
+    extractor = WebTextExtractor(extraction_mode=args.extraction_mode, verbose=False,
+                                 pool_maxsize=max(10, args.workers),
+                                 http_cache=build_http_cache(args),
+                                 max_bytes=args.max_page_size * 1024 * 1024,
+                                 parser=args.parser,
+                                 classify_workers=args.classify_workers,
+                                 language_backend=args.language_backend,
+                                 home_languages=args.home_languages,
+                                 adjudicator=build_adjudicator(args))
+    crawler = Crawler(extractor, max_pages=args.max_pages, max_depth=args.max_depth,
+                      max_workers=args.workers, per_host_limit=args.per_host,
+                      delay=args.crawl_delay,
+                      boilerplate=(BoilerplateTracker(args.site_wide_min_pages)
+                                   if args.site_wide_min_pages > 0 else None))
+    print(f"Crawling {url} (up to {args.max_pages} page(s), depth {args.max_depth})...")
+    pages = crawler.crawl(url)
+    extractor.close()
+    
+    os.makedirs(args.output_dir, exist_ok=True)
+    report_path = os.path.join(args.output_dir, 'crawl_report.html')
+    with open(report_path, 'w', encoding='utf-8') as f, extractor.timed_stage('render'):
+        f.writelines(iter_crawl_report(url, pages, crawler.site_wide, extractor.home_name))
+    
+    failed = sum(1 for page in pages if page[3] is not None)
+    snippets = sum(len(page[2]) for page in pages if page[2] is not None)
+    print(f"\nCrawled {len(pages)} page(s), {failed} failed, "
+          f"{snippets} non-{extractor.home_name} snippet(s), {len(crawler.site_wide)} site-wide")
+    print(f"Report saved to: {report_path}")
+    if args.timings:
+        print_timings(before)
+    
+    if not pages or failed == len(pages):
+        sys.exit(1)
+
+
 def main():
     """Main function."""
     print("Web Page Non-Polish Text Extractor")
     print("=" * 40)
     
+    args = parse_args()
+    
     try:
+        if args.batch:
+            run_batch(args)
+            return
+        
+        if args.archive:
+            run_archive(args)
+            return
+        
         # Get URL input
-        url = get_url_input()
+        url = normalize_url(get_url_input(args.url))
         
         if not url:
             print("Error: No URL provided")
             sys.exit(1)
         
-        # Add protocol if missing
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
+        if args.crawl:
+            run_crawl(args, url)
+            return
         
         # Create extractor and process URL
-        extractor = WebTextExtractor()
-        html_output = extractor.process_url(url)
-        
-        # Save output to file
-        output_filename = "non_polish_text_results.html"
-        with open(output_filename, 'w', encoding='utf-8') as f:
-            f.write(html_output)
+        before = PIPELINE_METRICS.snapshot()
+        extractor = WebTextExtractor(extraction_mode=args.extraction_mode,
+                                     http_cache=build_http_cache(args),
+                                     max_bytes=args.max_page_size * 1024 * 1024,
+                                     parser=args.parser,
+                                     classify_workers=args.classify_workers,
+                                     language_backend=args.language_backend,
+                                     home_languages=args.home_languages,
+                                     adjudicator=build_adjudicator(args))
+        output_filename = f"non_polish_text_results.{FORMATS[args.output_format][1]}"
+        if args.snapshot_dir:
+            run_snapshot(args, url, extractor, output_filename)
+        elif args.output_format == 'ndjson':
+            # Write each snippet as soon as it is classified so readers can follow the file
+            with open(output_filename, 'w', encoding='utf-8') as f:
+                for line in iter_ndjson(extractor.iter_non_polish(url)):
+                    f.write(line)
+                    f.flush()
+            extractor.close()
+        else:
+            non_polish_elements = extractor.extract_non_polish(url)
+            extractor.close()
+            
+            # Stream the report to file instead of building it in memory
+            print(f"Generating {args.output_format.upper()} report...")
+            with open(output_filename, 'w', encoding='utf-8', newline='') as f, \
+                    extractor.timed_stage('render'):
+                f.writelines(extractor.iter_report(non_polish_elements, args.output_format, url))
         
         print(f"\nResults saved to: {output_filename}")
-        print("Open this file in a web browser to view the results.")
+        if args.output_format == 'html':
+            print("Open this file in a web browser to view the results.")
+        if args.timings:
+            print_timings(before)
         
+    except ImportError as e:
+        print(f"Error: Missing required library. Please install: {e.name}")
+        print("Install with: pip install requests beautifulsoup4 langdetect")
+        sys.exit(1)
     except Exception as e:
         print(f"Error: {str(e)}")
         sys.exit(1)